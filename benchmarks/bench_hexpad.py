@@ -0,0 +1,183 @@
+"""Benchmarks for the hexpad conversion hot paths.
+
+Run from the repository root:
+
+    python benchmarks/bench_hexpad.py                   # print throughput and peak memory
+    python benchmarks/bench_hexpad.py --check           # compare against baseline.json
+    python benchmarks/bench_hexpad.py --update-baseline # record a new baseline
+    python benchmarks/bench_hexpad.py --sizes 1K,1M,1G  # sizes up to 1G are supported
+"""
+import os
+import sys
+import json
+import timeit
+import random
+import argparse
+import platform
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+ENCODINGS = ["cp037 (ebcdic)", "cp500 (ebcdic international)", "cp1047 (ebcdic open systems)",
+             "cp273 (ebcdic germany)", "cp285 (ebcdic uk)", "utf-8", "ascii", "cp1252 (windows)", "iso-8859-1 (latin-1)"]
+WIDTHS = [8, 16, 32]
+DEFAULT_SIZES = "1K,64K,1M"
+
+# A result is a regression when it is this much slower (or bigger) than the baseline
+DEFAULT_TOLERANCE = 0.3
+
+SIZE_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+def parse_size(text):
+    """Parse sizes like 64K, 1M or 1G into a byte count"""
+    text = text.strip().upper()
+    if text[-1:] in SIZE_UNITS:
+        return int(text[:-1]) * SIZE_UNITS[text[-1]]
+    return int(text)
+
+def format_size(size):
+    """Format a byte count the way parse_size reads it"""
+    for unit in "GMK":
+        if size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return str(size)
+
+def sample_text(size):
+    """Printable ASCII text of exactly size characters, encodable in every supported encoding"""
+    reps = size // len(hexpad.SAMPLE_TEXT) + 1
+    return (hexpad.SAMPLE_TEXT * reps)[:size]
+
+def sample_bytes(size):
+    """Deterministic pseudo-random bytes"""
+    return random.Random(size).randbytes(size)
+
+def case_text_to_hexdump(size, encoding, width):
+    """text_to_hexdump over size bytes of text"""
+    text = sample_text(size)
+    return lambda: hexpad.text_to_hexdump(text, encoding, width)
+
+def case_format_hex_line(size, encoding, width):
+    """format_hex_line called once per line for size bytes"""
+    data = sample_bytes(size)
+    lines = [(i, data[i:i + width].hex(), data[i:i + width].decode('latin-1')) for i in range(0, size, width)]
+    return lambda: [hexpad.format_hex_line(offset, hex_bytes, ascii_chars, width) for offset, hex_bytes, ascii_chars in lines]
+
+def case_hex_to_text(size, encoding, width):
+    """hex_to_text over size bytes worth of spaced hex digits"""
+    hex_input = sample_text(size).encode('ascii').hex(' ')
+    return lambda: hexpad.hex_to_text(hex_input, encoding)
+
+def case_parse_hexdump(size, encoding, width):
+    """parse_hexdump over the dump of size random bytes"""
+    dump = hexpad.bytes_to_hexdump(sample_bytes(size), encoding, width)
+    return lambda: hexpad.parse_hexdump(dump)
+
+def case_ebcdic_char_to_printable(size, encoding, width):
+    """ebcdic_char_to_printable called once per byte for size bytes"""
+    data = sample_bytes(size)
+    return lambda: ''.join(map(hexpad.ebcdic_char_to_printable, data))
+
+# name -> (case builder, depends on encoding, depends on bytes per line)
+CASES = {
+    "text_to_hexdump": (case_text_to_hexdump, True, True),
+    "format_hex_line": (case_format_hex_line, False, True),
+    "hex_to_text": (case_hex_to_text, True, False),
+    "parse_hexdump": (case_parse_hexdump, False, True),
+    "ebcdic_char_to_printable": (case_ebcdic_char_to_printable, False, False),
+}
+
+def iter_cases(names, sizes):
+    """Yield (key, builder, size, encoding, width) for every combination a case depends on"""
+    for name in names:
+        builder, by_encoding, by_width = CASES[name]
+        for size in sizes:
+            for encoding in (ENCODINGS if by_encoding else ["utf-8"]):
+                for width in (WIDTHS if by_width else [16]):
+                    key = f"{name}|{format_size(size)}"
+                    if by_encoding:
+                        key += f"|{encoding}"
+                    if by_width:
+                        key += f"|{width}"
+                    yield key, builder, size, encoding, width
+
+def measure(run, size, repeat):
+    """Return (MB/s of the best of repeat samples, peak traced memory in MB)"""
+    # Like timeit, small inputs run several times per sample to get above timer noise
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    
+    # Peak memory comes from a separate traced run so tracing doesn't skew the timing
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return size / (1 << 20) / max(best, 1e-9), peak / (1 << 20)
+
+def check(results, baseline, tolerance):
+    """Return a list of regression messages for results compared with baseline"""
+    failures = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if result["mb_per_s"] < expected["mb_per_s"] * (1 - tolerance):
+            failures.append(f"{key}: {result['mb_per_s']:.2f} MB/s, baseline {expected['mb_per_s']:.2f} MB/s")
+        # Small peaks are dominated by allocator noise, only compare from 1 MB up
+        if result["peak_mb"] > max(expected["peak_mb"] * (1 + tolerance), 1.0):
+            failures.append(f"{key}: peak {result['peak_mb']:.2f} MB, baseline {expected['peak_mb']:.2f} MB")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hexpad conversion hot paths.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma separated input sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma separated functions to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="timed samples per case, the best one counts (default: 5)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if any case regressed against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed slowdown/growth before a case counts as a regression (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+    
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    names = [name.strip() for name in args.cases.split(",")]
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    
+    results = {}
+    for key, builder, size, encoding, width in iter_cases(names, sizes):
+        mb_per_s, peak_mb = measure(builder(size, encoding, width), size, args.repeat)
+        results[key] = {"mb_per_s": round(mb_per_s, 3), "peak_mb": round(peak_mb, 3)}
+        print(f"{key:<55} {mb_per_s:>10.2f} MB/s {peak_mb:>10.2f} MB peak", flush=True)
+    
+    if args.update_baseline:
+        baseline = {
+            "machine": {"python": platform.python_version(), "platform": platform.platform()},
+            "results": results,
+        }
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        failures = check(results, baseline, args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
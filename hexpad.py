@@ -1,168 +1,3101 @@
-import streamlit as st
 import io
+import os
+import sys
+import html
+import re
+import json
+import array
+import bisect
+import time
+import pstats
+import cProfile
+import mmap
+import shutil
+import hashlib
+import codecs
+import csv
+import binascii
+import argparse
+import tempfile
+import gzip
+import base64
+import threading
+import uuid
+import functools
+import itertools
+import contextlib
+import collections
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
 
 SAMPLE_TEXT = "1234567890-=qwertyuiop[]\\asdfghjkl;'zxcvbnm,./~!@#$%^&*()_+{}|:\"<>?QWERTYUIOPASDFGHJKLZXCVBNM"
 
+# Map UI encoding names to Python codec names
+ENCODING_MAP = {
+    'cp037 (ebcdic)': 'cp037',
+    'cp500 (ebcdic international)': 'cp500',
+    'cp1047 (ebcdic open systems)': 'cp1047',
+    'cp273 (ebcdic germany)': 'cp273',
+    'cp285 (ebcdic uk)': 'cp285',
+    'utf-8': 'utf-8',
+    'ascii': 'ascii',
+    'cp1252 (windows)': 'cp1252',
+    'iso-8859-1 (latin-1)': 'iso-8859-1'
+}
+
 def format_hex_line(offset, hex_bytes, ascii_chars, bytes_per_line=16):
     """Format a line in hexdump style with spacing every 4 bytes"""
     # Format offset as decimal (0, 16, 32, etc.)
     offset_str = f"{offset}"
 
-    # Calculate how many actual bytes we have
-    actual_bytes = len(hex_bytes) // 2
+    # Calculate how many actual bytes we have
+    actual_bytes = len(hex_bytes) // 2
+    
+    # Format hex bytes with spaces and extra space every 4 bytes
+    hex_parts = []
+    for i in range(0, len(hex_bytes), 2):
+        if i + 1 < len(hex_bytes):
+            hex_parts.append(hex_bytes[i:i+2])
+        else:
+            hex_parts.append(hex_bytes[i] + " ")
+
+    # Pad with empty spaces for missing bytes to maintain alignment
+    for i in range(actual_bytes, bytes_per_line):
+        hex_parts.append("  ")  # Two spaces for missing byte
+
+    # Add extra spacing every 4 bytes (every 4 hex pairs)
+    formatted_hex = []
+    for i, hex_pair in enumerate(hex_parts):
+        formatted_hex.append(hex_pair)
+        if (i + 1) % 4 == 0 and i + 1 < len(hex_parts):
+            formatted_hex.append(" ")  # Extra space every 4 bytes
+    
+    # Join with spaces and calculate proper padding width
+    hex_section = " ".join(formatted_hex)
+    
+    # Format ASCII section - ALWAYS pad to bytes_per_line width so it never shifts
+    ascii_section = "|" + ascii_chars.ljust(bytes_per_line) + "|"
+    
+    return f"{offset_str:<6}  {hex_section}  {ascii_section}"
+
+def char_to_printable(byte_val):
+    """Convert byte to printable ASCII character"""
+    if 32 <= byte_val <= 126:  # Printable ASCII range
+        return chr(byte_val)
+    else:
+        return "."
+
+# EBCDIC codepages with a display table. cp1047 and cp285 aren't in the
+# stdlib, they are registered below as cp037 with their own code points
+EBCDIC_CODEPAGES = ['cp037', 'cp500', 'cp1047', 'cp273', 'cp285']
+
+# Code points where a codepage differs from cp037
+EBCDIC_CODEPAGE_DELTAS = {
+    'cp1047': {0x5F: '^', 0xAD: '[', 0xB0: '\xac', 0xBA: '\xdd', 0xBB: '\xa8', 0xBD: ']'},
+    'cp285': {0x4A: '$', 0x5B: '\xa3', 0xA1: '\u203e', 0xB0: '\xa2', 0xB1: '[', 0xBA: '^', 0xBC: '~'},
+}
+
+def _ebcdic_codec_search(name):
+    """Codec search function for the EBCDIC codepages missing from the stdlib"""
+    if name not in EBCDIC_CODEPAGE_DELTAS:
+        return None
+    
+    decoding = list(bytes(range(256)).decode('cp037'))
+    for byte_val, char in EBCDIC_CODEPAGE_DELTAS[name].items():
+        decoding[byte_val] = char
+    decoding_table = ''.join(decoding)
+    encoding_table = codecs.charmap_build(decoding_table)
+    
+    # Same shape as the stdlib's generated charmap codecs (encodings/cp037.py)
+    class IncrementalEncoder(codecs.IncrementalEncoder):
+        def encode(self, input, final=False):
+            return codecs.charmap_encode(input, self.errors, encoding_table)[0]
+    
+    class IncrementalDecoder(codecs.IncrementalDecoder):
+        def decode(self, input, final=False):
+            return codecs.charmap_decode(input, self.errors, decoding_table)[0]
+    
+    return codecs.CodecInfo(
+        name=name,
+        encode=lambda input, errors='strict': codecs.charmap_encode(input, errors, encoding_table),
+        decode=lambda input, errors='strict': codecs.charmap_decode(input, errors, decoding_table),
+        incrementalencoder=IncrementalEncoder,
+        incrementaldecoder=IncrementalDecoder,
+    )
+
+codecs.register(_ebcdic_codec_search)
+
+def codepage_display_table(codec):
+    """Build the 256-byte table mapping each byte of a codepage to its printable ASCII character or '.'"""
+    chars = bytes(range(256)).decode(codec)
+    return bytes(ord(c) if ' ' <= c <= '~' else 0x2E for c in chars)
+
+# Precomputed 256-entry printable tables used by the block renderer
+ASCII_DISPLAY_TABLE = bytes(b if 32 <= b <= 126 else 0x2E for b in range(256))
+CODEPAGE_DISPLAY_TABLES = {codec: codepage_display_table(codec) for codec in EBCDIC_CODEPAGES}
+EBCDIC_DISPLAY_TABLE = CODEPAGE_DISPLAY_TABLES['cp037']
+
+# Candidate codecs for encoding auto-detection, earlier ones win ties
+DETECT_ENCODINGS = ['utf-8', 'ascii', 'cp1252', 'iso-8859-1'] + EBCDIC_CODEPAGES
+
+def detect_char_weight(char):
+    """How typical of text a character is, from 1 for ASCII letters, digits and spaces to -1 for controls"""
+    if char is None or not (char.isprintable() or char in '\t\n\r'):
+        return -1.0
+    if char.isascii() and (char.isalnum() or char == ' '):
+        return 1.0
+    if char.isascii() or char.isalpha():
+        return 0.5
+    return 0.0
+
+def _detect_weights(codec):
+    """Weight of every byte value decoded with a single-byte codec; bytes it can't decode get -1"""
+    chars = []
+    for b in range(256):
+        try:
+            chars.append(bytes([b]).decode(codec))
+        except UnicodeDecodeError:
+            chars.append(None)
+    return tuple(map(detect_char_weight, chars))
+
+# Byte value weights per candidate codec; UTF-8's are ASCII's, its upper half
+# is weighted by how much of a sample forms valid sequences
+DETECT_WEIGHTS = {codec: _detect_weights('ascii' if codec == 'utf-8' else codec) for codec in DETECT_ENCODINGS}
+
+def ebcdic_char_to_printable(byte_val):
+    """Convert EBCDIC byte to its actual character representation"""
+    return chr(EBCDIC_DISPLAY_TABLE[byte_val])
+
+# Number of lines rendered per block by the hexdump renderer
+HEXDUMP_BLOCK_LINES = 4096
+
+# Copy buffer size used when spooling uploads to disk
+SPOOL_COPY_SIZE = 1 << 20
+
+# Inputs smaller than this are always dumped in a single process
+PARALLEL_THRESHOLD = 16 << 20
+
+# Bytes formatted by each worker task in parallel mode (rounded to whole lines)
+PARALLEL_CHUNK_SIZE = 4 << 20
+
+# Hex digits sanitised and decoded per chunk by the incremental decoder
+HEX_DECODE_CHUNK = 1 << 20
+
+# Every byte that isn't a hex digit, dropped by one bytes.translate call
+NON_HEX_BYTES = bytes(b for b in range(256) if b not in b'0123456789abcdefABCDEF')
+
+# Result cache limits, configurable through the environment
+CACHE_MAX_ENTRIES = int(os.environ.get('HEXPAD_CACHE_MAX_ENTRIES', 64))
+CACHE_MAX_BYTES = int(os.environ.get('HEXPAD_CACHE_MAX_MB', 256)) << 20
+
+# Background jobs run at once per process, and finished jobs kept for later reruns
+JOB_WORKERS = int(os.environ.get('HEXPAD_JOB_WORKERS', 4))
+JOB_MAX_FINISHED = 32
+
+# Seconds a rerun waits for a new job before showing its progress, so quick jobs never show a progress bar
+JOB_WAIT_SECONDS = 0.25
+
+# Compression level of gzipped exports; level 1 compresses hexdumps nearly as well as 6 at several times the speed
+EXPORT_GZIP_LEVEL = 1
+
+# Seconds between progress refreshes of a running job in the UI
+JOB_POLL_SECONDS = 0.5
+
+# Functions listed in a captured cProfile summary
+PROFILE_TOP_FUNCTIONS = 25
+
+# Page sizes offered by the hexdump viewer
+VIEWER_PAGE_SIZES = [50, 100, 250, 500, 1000]
+
+# Largest typed input whose formatted lines are kept for incremental re-dumps,
+# every 16 bytes cost a line string of about 130 bytes
+INCREMENTAL_MAX_BYTES = 8 << 20
+
+# Record layouts understood by record mode: fixed LRECL, RDW variable,
+# BDW blocked RDW variable, and delimiter (newline) separated records
+RECORD_FORMATS = ['fixed', 'variable', 'blocked', 'newline']
+
+# Map UI record format names to record mode formats, None dumps one flat stream
+RECORD_FORMAT_OPTIONS = {
+    'None (flat dump)': None,
+    'Fixed (LRECL)': 'fixed',
+    'Variable (RDW)': 'variable',
+    'Variable blocked (BDW + RDW)': 'blocked',
+    'Newline-delimited': 'newline'
+}
+
+# Map UI search kinds to search modes
+SEARCH_MODE_OPTIONS = {
+    'Text (in the selected encoding)': 'text',
+    'Hex bytes': 'hex',
+    'Byte regex': 'regex'
+}
+
+# Encodings offered in the sidebar; the last one detects the codepage from the data
+ENCODING_OPTIONS = [
+    "CP037 (EBCDIC)", "CP500 (EBCDIC International)", "CP1047 (EBCDIC Open Systems)",
+    "CP273 (EBCDIC Germany)", "CP285 (EBCDIC UK)",
+    "UTF-8", "ASCII", "CP1252 (Windows)", "ISO-8859-1 (Latin-1)"
+]
+AUTO_ENCODING = "Auto-detect"
+
+# Map UI dump format names to output formats, for exports and Hex to Text input
+DUMP_FORMAT_OPTIONS = {
+    'Hexdump': 'hexpad',
+    'xxd': 'xxd',
+    'od -A x -t x1z': 'od',
+    'hexdump -C': 'canonical',
+    'C array': 'c',
+    'Python bytes': 'python',
+    'Base64': 'base64'
+}
+
+# Map UI statistics scan options to byte_stats sample values, None samples large inputs only
+STATS_SCAN_OPTIONS = {
+    'Auto (sample inputs of 1 GB or more)': None,
+    'Full scan': False,
+    'Sampled': True
+}
+
+# Records indexed between progress reports of a record index build
+RECORD_PROGRESS_RECORDS = 65536
+
+# Page sizes offered by the record viewer
+RECORD_PAGE_SIZES = [10, 25, 50, 100]
+
+# Bytes compared per step when diffing, and per sub-block within a differing block
+DIFF_BLOCK_SIZE = 1 << 20
+DIFF_SUB_BLOCK_SIZE = 1 << 12
+
+# Unchanged lines shown around each difference, and the most lines in one hunk
+DIFF_CONTEXT_LINES = 2
+DIFF_MAX_HUNK_LINES = 64
+
+# Hunks kept for the compare viewer, and hunks shown per page
+DIFF_MAX_HUNKS = 100000
+DIFF_PAGE_HUNKS = 10
+
+# Search pattern kinds, bytes scanned per search step, and the longest byte regex match found
+SEARCH_MODES = ['hex', 'text', 'regex']
+SEARCH_CHUNK_SIZE = 1 << 22
+SEARCH_REGEX_OVERLAP = 1 << 12
+
+# Matches kept for the search results list
+SEARCH_MAX_MATCHES = 10000
+
+# Most blocks in the byte statistics entropy map, blocks grow (in powers of
+# two, so they stay line aligned) to keep larger inputs within it
+STATS_MAX_BLOCKS = 512
+STATS_MIN_BLOCK_SIZE = 1 << 12
+
+# Inputs from this size on are sampled instead of fully scanned for statistics
+STATS_SAMPLE_THRESHOLD = 1 << 30
+
+# Sampled statistics read this many windows of this many bytes spread over every block
+STATS_SAMPLE_WINDOWS = 4
+STATS_SAMPLE_BYTES = 1 << 14
+
+# Encoding auto-detection scores this many windows of this many bytes spread over the input
+DETECT_SAMPLE_WINDOWS = 8
+DETECT_SAMPLE_BYTES = 1 << 13
+
+# Average score lead, per byte the runner-up reads differently, that counts as a clear win
+DETECT_CLEAR_MARGIN = 0.5
+
+# Detections below this confidence are shown as a warning
+DETECT_MIN_CONFIDENCE = 0.5
+
+# Bytes per base64 line, 76 characters as MIME and base64(1) wrap them
+BASE64_LINE_BYTES = 57
+
+# A byte literal of a C or Python array, not part of an identifier
+C_BYTE_PATTERN = re.compile(r'\b0[xX]([0-9a-fA-F]{2})\b')
+
+# Records decoded per NumPy batch when exporting copybook fields
+COPYBOOK_BATCH_RECORDS = 1 << 16
+
+# One elementary copybook item: kind is text, zoned, packed or binary, and
+# numeric values are scaled by 10 ** -scale (the digits after the V)
+CopybookField = collections.namedtuple('CopybookField', 'name offset length kind digits scale signed')
+
+# Copybook clauses that can follow the level number in place of a name
+COPYBOOK_CLAUSES = {'PIC', 'PICTURE', 'REDEFINES', 'OCCURS', 'USAGE', 'VALUE'}
+
+# Copybook USAGE clauses and the field kind they give numeric items
+COPYBOOK_USAGES = {
+    'DISPLAY': 'zoned',
+    'COMP-3': 'packed', 'COMPUTATIONAL-3': 'packed', 'PACKED-DECIMAL': 'packed',
+    'COMP': 'binary', 'COMPUTATIONAL': 'binary', 'COMP-4': 'binary', 'COMPUTATIONAL-4': 'binary',
+    'COMP-5': 'binary', 'COMPUTATIONAL-5': 'binary', 'BINARY': 'binary'
+}
+
+def display_table_for(encoding):
+    """Return the translation table used for the ASCII column of an encoding"""
+    # Normalise aliases like ibm500 or ebcdic-cp-us to the codec's own name
+    try:
+        codec = codecs.lookup(resolve_encoding(encoding)).name
+    except LookupError:
+        return ASCII_DISPLAY_TABLE
+    return CODEPAGE_DISPLAY_TABLES.get(codec, ASCII_DISPLAY_TABLE)
+
+def _hex_columns(data, bytes_per_line, group=4, gap=b'   '):
+    """Render the hex column of every line in data in one pass, with a wider gap after every group bytes"""
+    # Every byte becomes a 3-char "xx " slot; a short last line gets blank slots
+    rows = -(-len(data) // bytes_per_line)
+    width = 3 * bytes_per_line
+    buf = bytearray(binascii.hexlify(data, ' '))
+    buf += b' ' * (rows * width - len(buf))
+    
+    # Mark the gap after every group, then overwrite the line ends
+    if group:
+        step = 3 * group
+        buf[step - 1::step] = b'\x00' * len(range(step - 1, len(buf), step))
+    buf[width - 1::width] = b'\n' * rows
+    
+    return buf.replace(b'\x00', gap).decode('ascii').split('\n')[:-1]
+
+def _text_columns(data, bytes_per_line, display_table, pad=False):
+    """Render the text column of every line in data in one pass"""
+    text = bytes(data).translate(display_table).decode('ascii')
+    columns = [text[i:i + bytes_per_line] for i in range(0, len(text), bytes_per_line)]
+    if pad:
+        columns[-1] = columns[-1].ljust(bytes_per_line)
+    return columns
+
+def render_hexdump_lines(data, offset=0, bytes_per_line=16, display_table=ASCII_DISPLAY_TABLE):
+    """Render a block of bytes as hexdump lines in the format_hex_line layout"""
+    if not data:
+        return []
+    
+    if bytes_per_line % 4:
+        # Odd line widths don't fit the 4-byte grouping trick, use the slow path
+        lines = []
+        for i in range(0, len(data), bytes_per_line):
+            chunk = bytes(data[i:i + bytes_per_line])
+            ascii_chars = chunk.translate(display_table).decode('ascii')
+            lines.append(format_hex_line(offset + i, chunk.hex(), ascii_chars, bytes_per_line))
+        return lines
+    
+    ascii_cols = _text_columns(data, bytes_per_line, display_table, pad=True)
+    offsets = range(offset, offset + len(data), bytes_per_line)
+    return list(map('{:<6}  {}  |{}|'.format, offsets, _hex_columns(data, bytes_per_line), ascii_cols))
+
+def render_xxd_lines(data, offset=0, bytes_per_line=16, display_table=ASCII_DISPLAY_TABLE):
+    """Render a block of bytes as xxd lines: hex offset, 2-byte groups and the text column"""
+    if not data:
+        return []
+    if bytes_per_line % 2:
+        raise ValueError("xxd lines need an even number of bytes per line")
+    
+    # Every 2 bytes become a 5-char "xxxx " slot, like in _hex_columns
+    rows = -(-len(data) // bytes_per_line)
+    width = 5 * (bytes_per_line // 2)
+    buf = bytearray(binascii.hexlify(data, ' ', -2))
+    buf += b' ' * (rows * width - len(buf))
+    buf[width - 1::width] = b'\n' * rows
+    
+    offsets = range(offset, offset + len(data), bytes_per_line)
+    hex_cols = buf.decode('ascii').split('\n')[:-1]
+    return list(map('{:08x}: {}  {}'.format, offsets, hex_cols, _text_columns(data, bytes_per_line, display_table)))
+
+def render_od_lines(data, offset=0, bytes_per_line=16, display_table=ASCII_DISPLAY_TABLE):
+    """Render a block of bytes as `od -A x -t x1z` lines"""
+    if not data:
+        return []
+    offsets = range(offset, offset + len(data), bytes_per_line)
+    hex_cols = _hex_columns(data, bytes_per_line, group=None)
+    return list(map('{:06x} {}  >{}<'.format, offsets, hex_cols, _text_columns(data, bytes_per_line, display_table)))
+
+def render_canonical_lines(data, offset=0, bytes_per_line=16, display_table=ASCII_DISPLAY_TABLE):
+    """Render a block of bytes as canonical `hexdump -C` lines, with 8-byte groups"""
+    if not data:
+        return []
+    if bytes_per_line % 8:
+        raise ValueError("Canonical lines need a multiple of 8 bytes per line")
+    offsets = range(offset, offset + len(data), bytes_per_line)
+    hex_cols = _hex_columns(data, bytes_per_line, group=8, gap=b'  ')
+    return list(map('{:08x}  {}  |{}|'.format, offsets, hex_cols, _text_columns(data, bytes_per_line, display_table)))
+
+def render_c_lines(data, offset=0, bytes_per_line=16, display_table=None, indent='  '):
+    """Render a block of bytes as lines of comma-separated 0x literals, for C and Python arrays"""
+    hex_text = binascii.hexlify(data, ' ').decode('ascii')
+    width = 3 * bytes_per_line
+    return [f"{indent}0x{hex_text[i:i + width - 1].replace(' ', ', 0x')}," for i in range(0, len(hex_text), width)]
+
+def render_base64_lines(data, offset=0, bytes_per_line=16, display_table=None):
+    """Render a block of bytes as 76-character base64 lines"""
+    return base64.encodebytes(bytes(data)).decode('ascii').splitlines()
+
+def render_squeezed_lines(data, offset=0, bytes_per_line=16, display_table=ASCII_DISPLAY_TABLE, state=None,
+                          render=render_hexdump_lines):
+    """Render hexdump lines with render, collapsing lines equal to the one before into '*'
+
+    state is (previous line's bytes, whether its run already got its '*'), so
+    consecutive chunks squeeze across their boundary; the new state is returned
+    with the lines.
+    """
+    import numpy as np
+    
+    previous, starred = state or (None, False)
+    if not len(data):
+        return [], (previous, starred)
+    
+    # Find every repeated line in one vectorised compare of each row with the one before
+    count = -(-len(data) // bytes_per_line)
+    full = len(data) // bytes_per_line
+    rows = np.frombuffer(data, dtype=np.uint8, count=full * bytes_per_line).reshape(full, bytes_per_line)
+    repeats = np.zeros(count, dtype=bool)
+    repeats[1:full] = (rows[1:] == rows[:-1]).all(axis=1)
+    repeats[0] = previous is not None and bytes(data[:bytes_per_line]) == previous
+    previous = bytes(data[(count - 1) * bytes_per_line:])
+    
+    # Lines between repeats are still rendered in bulk
+    lines = []
+    start = 0
+    for i in np.flatnonzero(repeats).tolist():
+        if start < i:
+            lines += render(data[start * bytes_per_line:i * bytes_per_line], offset + start * bytes_per_line, bytes_per_line, display_table)
+            starred = False
+        if not starred:
+            lines.append('*')
+            starred = True
+        start = i + 1
+    if start < count:
+        lines += render(data[start * bytes_per_line:], offset + start * bytes_per_line, bytes_per_line, display_table)
+        starred = False
+    return lines, (previous, starred)
+
+def resolve_encoding(encoding):
+    """Map a UI encoding name to its Python codec name"""
+    return ENCODING_MAP.get(encoding.lower(), encoding.lower())
+
+@contextlib.contextmanager
+def open_dump_source(source):
+    """Open a path, binary file object, mmap or bytes-like object for reading"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield f
+    else:
+        yield source
+
+def iter_source_chunks(source, chunk_size):
+    """Yield chunk_size pieces of a dump source, only the last one may be shorter"""
+    with open_dump_source(source) as src:
+        if isinstance(src, (bytes, bytearray, memoryview, mmap.mmap)):
+            for i in range(0, len(src), chunk_size):
+                yield src[i:i + chunk_size]
+            return
+        
+        while True:
+            chunk = src.read(chunk_size)
+            # Pipes and sockets may return short reads, keep chunks line aligned
+            while chunk and len(chunk) < chunk_size:
+                more = src.read(chunk_size - len(chunk))
+                if not more:
+                    break
+                chunk += more
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+
+def iter_hexdump_lines(source, encoding='utf-8', bytes_per_line=16, squeeze=False, output_format='hexpad', name='data'):
+    """Lazily yield lists of hexdump lines for a path, binary file, mmap or bytes object
+
+    With squeeze, repeated lines become a single '*' like hexdump -C, and a
+    last line holding just the total length marks where the data ends.
+    output_format picks one of OUTPUT_FORMATS; those that can't squeeze
+    ignore it, and name is the variable of C and Python arrays.
+    """
+    fmt = get_output_format(output_format)
+    squeeze = squeeze and fmt.squeeze
+    table = display_table_for(encoding)
+    header = fmt.header(name)
+    if header:
+        yield header
+    
+    offset = 0
+    state = None
+    for chunk in iter_source_chunks(source, (fmt.unit or bytes_per_line) * HEXDUMP_BLOCK_LINES):
+        if squeeze:
+            lines, state = render_squeezed_lines(chunk, offset, bytes_per_line, table, state, fmt.render)
+            if lines:
+                yield lines
+        else:
+            yield fmt.render(chunk, offset, bytes_per_line, table)
+        offset += len(chunk)
+    
+    footer = fmt.footer(offset, squeeze, name)
+    if footer:
+        yield footer
+
+def iter_hexdump(source, encoding='utf-8', bytes_per_line=16, squeeze=False, output_format='hexpad', name='data'):
+    """Lazily yield newline-terminated hexdump blocks, ready to be written out"""
+    for lines in iter_hexdump_lines(source, encoding, bytes_per_line, squeeze, output_format, name):
+        yield '\n'.join(lines) + '\n'
+
+def _render_range(data, start, length, encoding, bytes_per_line, squeeze=False, output_format='hexpad'):
+    """Render bytes start .. start + length of a buffer as newline-terminated hexdump text"""
+    fmt = get_output_format(output_format)
+    squeeze = squeeze and fmt.squeeze
+    table = display_table_for(encoding)
+    span = (fmt.unit or bytes_per_line) * HEXDUMP_BLOCK_LINES
+    end = start + length
+    lines = []
+    # Squeezing continues from the line just before the range
+    state = (bytes(data[start - bytes_per_line:start]), False) if squeeze and start else None
+    for i in range(start, end, span):
+        chunk = data[i:min(i + span, end)]
+        if squeeze:
+            chunk_lines, state = render_squeezed_lines(chunk, i, bytes_per_line, table, state, fmt.render)
+            lines.extend(chunk_lines)
+        else:
+            lines.extend(fmt.render(chunk, i, bytes_per_line, table))
+    return '\n'.join(lines) + '\n' if lines else ''
+
+def _dump_file_range(path, start, length, encoding, bytes_per_line, squeeze=False, output_format='hexpad'):
+    """Worker task: map the file itself and render one range of it"""
+    with map_file(path) as data:
+        return _render_range(data, start, length, encoding, bytes_per_line, squeeze, output_format)
+
+def _dump_shared_range(name, start, length, encoding, bytes_per_line, squeeze=False, output_format='hexpad'):
+    """Worker task: attach to the shared memory block and render one range of it"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return _render_range(shm.buf, start, length, encoding, bytes_per_line, squeeze, output_format)
+    finally:
+        shm.close()
+
+def _iter_ordered_results(pool, task, calls, window):
+    """Submit task for every argument tuple with at most window in flight, yielding results in order"""
+    pending = collections.deque()
+    for args in calls:
+        pending.append(pool.submit(task, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _stitch_squeezed(blocks):
+    """Drop the '*' a block starts with when the block before already starred the same run"""
+    starred = False
+    for block in blocks:
+        if starred and block.startswith('*\n'):
+            block = block[2:]
+        if block:
+            starred = block.endswith('*\n')
+            yield block
+
+def iter_hexdump_parallel(source, encoding='utf-8', bytes_per_line=16, workers=None,
+                          threshold=PARALLEL_THRESHOLD, chunk_size=PARALLEL_CHUNK_SIZE, squeeze=False,
+                          output_format='hexpad', name='data'):
+    """Yield the same blocks as iter_hexdump, formatting line-aligned chunks in a process pool"""
+    if isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+    elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        source = memoryview(source).cast('B')
+        size = len(source)
+    else:
+        # Plain file objects can't be shared with workers, stream them instead
+        size = None
+    
+    workers = workers or os.cpu_count() or 1
+    # Empty input has nothing to share with workers either
+    if not size or size < threshold or workers < 2:
+        yield from iter_hexdump(source, encoding, bytes_per_line, squeeze, output_format, name)
+        return
+    
+    fmt = get_output_format(output_format)
+    squeeze = squeeze and fmt.squeeze
+    unit = fmt.unit or bytes_per_line
+    span = max(1, chunk_size // unit) * unit
+    with contextlib.ExitStack() as stack:
+        # Workers map the data themselves instead of receiving pickled copies
+        if isinstance(source, memoryview):
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            stack.callback(shm.unlink)
+            stack.callback(shm.close)
+            shm.buf[:size] = source
+            task, target = _dump_shared_range, shm.name
+        else:
+            task, target = _dump_file_range, os.fspath(source)
+        
+        pool = ProcessPoolExecutor(max_workers=workers)
+        stack.callback(pool.shutdown, wait=True, cancel_futures=True)
+        
+        header = fmt.header(name)
+        if header:
+            yield '\n'.join(header) + '\n'
+        
+        # Keep a bounded window of chunks in flight and yield them in offset order
+        calls = ((target, start, min(span, size - start), encoding, bytes_per_line, squeeze, output_format) for start in range(0, size, span))
+        blocks = _iter_ordered_results(pool, task, calls, 2 * workers)
+        yield from _stitch_squeezed(blocks) if squeeze else blocks
+        
+        footer = fmt.footer(size, squeeze, name)
+        if footer:
+            yield '\n'.join(footer) + '\n'
+
+def bytes_to_hexdump(data, encoding='utf-8', bytes_per_line=16, parallel=False, squeeze=False, output_format='hexpad'):
+    """Convert raw bytes (or any dump source) to hexdump format"""
+    if parallel:
+        return ''.join(iter_hexdump_parallel(data, encoding, bytes_per_line, squeeze=squeeze, output_format=output_format))[:-1]
+    blocks = iter_hexdump_lines(data, encoding, bytes_per_line, squeeze, output_format)
+    return '\n'.join(itertools.chain.from_iterable(blocks))
+
+def encode_text(text, encoding='utf-8'):
+    """Encode text, replacing characters the encoding can't represent"""
+    enc = resolve_encoding(encoding)
+    try:
+        return text.encode(enc)
+    except UnicodeEncodeError:
+        return text.encode(enc, errors='replace')
+
+def text_to_hexdump(text, encoding='utf-8', bytes_per_line=16, parallel=False, squeeze=False, output_format='hexpad'):
+    """Convert text to hexdump format"""
+    return bytes_to_hexdump(encode_text(text, encoding), encoding, bytes_per_line, parallel, squeeze, output_format)
+
+def content_hash(source, progress=None):
+    """Hash the bytes of a dump source chunk by chunk"""
+    digest = hashlib.blake2b(digest_size=20)
+    done = 0
+    for chunk in iter_source_chunks(source, SPOOL_COPY_SIZE):
+        digest.update(chunk)
+        done += len(chunk)
+        if progress:
+            progress(done)
+    return digest.hexdigest()
+
+def _result_size(value):
+    """Approximate memory held by a cached result"""
+    if isinstance(value, (tuple, list)):
+        return sum(map(_result_size, value))
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """Thread-safe LRU cache for conversion results, bounded by entry count and memory"""
+    
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_or_compute(self, key, compute):
+        """Return the cached result for key, computing and storing it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+        
+        # Compute outside the lock so other sessions aren't blocked meanwhile
+        value = compute()
+        size = _result_size(value)
+        if size > self.max_bytes:
+            return value
+        
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+        return value
+    
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.size = self.hits = self.misses = 0
+    
+    def stats(self):
+        """Return the counters shown in the UI"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self.size}
+
+class StageTimer:
+    """Collects exclusive wall-clock time per conversion stage, optionally under cProfile"""
+    
+    def __init__(self, profile=False):
+        self.stages = {}
+        self.meta = {}
+        self.profile_text = None
+        self._stack = []
+        self._profiler = cProfile.Profile() if profile else None
+    
+    @property
+    def profiling(self):
+        """Whether this timer captures a cProfile"""
+        return self._profiler is not None
+    
+    def __enter__(self):
+        if self._profiler:
+            self._profiler.enable()
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self._profiler:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+            self.profile_text = out.getvalue()
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a block; time spent in nested stages is only counted for those"""
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed - frame[1]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+    
+    def add(self, stages):
+        """Count stage times measured by another timer, such as a background job's"""
+        for name, seconds in stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+    
+    def timed_iter(self, name, iterable):
+        """Wrap an iterator so the time spent producing each item counts towards a stage"""
+        items = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+            yield item
+    
+    def to_json(self):
+        """Export the timings (and the profile, if captured) as JSON"""
+        return json.dumps({
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            "total_ms": round(sum(self.stages.values()) * 1000, 3),
+            "meta": self.meta,
+            "profile": self.profile_text,
+        }, indent=2)
+
+def _timed(timer, name, iterable):
+    """Time an iterator with timer if one is given"""
+    return timer.timed_iter(name, iterable) if timer else iterable
+
+class JobCancelled(Exception):
+    """Raised inside a job's task once the job has been cancelled"""
+
+class Job:
+    """A conversion running in the background, with byte progress and cooperative cancellation"""
+    
+    def __init__(self, total, cleanup=None):
+        self.total = total
+        self.done = 0
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.started = time.time()
+        # Stages the task times, counted once into the timer of the rerun that collects the result
+        self.timer = StageTimer()
+        self.reported = False
+        self._cleanup = cleanup
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+    
+    @property
+    def finished(self):
+        """Whether the job completed, failed or was cancelled"""
+        return self.status in ('done', 'failed', 'cancelled')
+    
+    @property
+    def fraction(self):
+        """Share of the input processed so far, between 0 and 1"""
+        if self.status == 'done':
+            return 1.0
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+    
+    def update(self, done):
+        """Record how many input bytes were processed, stopping the task if the job was cancelled"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.done = done
+    
+    def cancel(self):
+        """Ask the task to stop at its next progress update"""
+        self._cancel.set()
+    
+    def wait(self, timeout=None):
+        """Block until the job has finished or timeout seconds passed, returning whether it finished"""
+        return self._finished.wait(timeout)
+    
+    def discard(self):
+        """Cancel the job and release its result, now or as soon as the task returns"""
+        with self._lock:
+            self._cancel.set()
+            if self.status == 'done' and self._cleanup:
+                self._cleanup(self.result)
+                self.result = None
+    
+    def run(self, task):
+        """Run task(job) and keep its result, or why it didn't finish"""
+        try:
+            self._run(task)
+        finally:
+            self._finished.set()
+    
+    def _run(self, task):
+        if self._cancel.is_set():
+            self.status = 'cancelled'
+            return
+        self.status = 'running'
+        try:
+            result = task(self)
+        except JobCancelled:
+            self.status = 'cancelled'
+            return
+        except Exception as e:
+            self.error = str(e)
+            self.status = 'failed'
+            return
+        
+        with self._lock:
+            # Discarded while the task was finishing, nobody will collect the result
+            if self._cancel.is_set():
+                if self._cleanup:
+                    self._cleanup(result)
+                self.status = 'cancelled'
+                return
+            self.result = result
+            self.status = 'done'
+
+class JobManager:
+    """Runs jobs on a bounded thread pool, keyed so later reruns find the running or finished job"""
+    
+    def __init__(self, workers=JOB_WORKERS, max_finished=JOB_MAX_FINISHED):
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hexpad-job")
+        self._jobs = collections.OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """The job submitted under key, or None"""
+        with self._lock:
+            return self._jobs.get(key)
+    
+    def submit(self, key, task, total, cleanup=None):
+        """Queue task(job) under key, unless a job for key is already running or done
+
+        cleanup is called with the result once the job is discarded or pruned.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status not in ('failed', 'cancelled'):
+                return job
+            job = self._jobs[key] = Job(total, cleanup)
+            self._jobs.move_to_end(key)
+            
+            # Only the most recent finished jobs keep their results
+            finished = [k for k, j in self._jobs.items() if j.finished]
+            pruned = [self._jobs.pop(k) for k in finished[:max(len(finished) - self.max_finished, 0)]]
+        for old in pruned:
+            old.discard()
+        self._pool.submit(job.run, task)
+        return job
+    
+    def discard(self, key):
+        """Cancel the job under key, release its result and forget it"""
+        with self._lock:
+            job = self._jobs.pop(key, None)
+        if job is not None:
+            job.discard()
+
+class _ProgressReader:
+    """Binary reader reporting the total bytes read so far to a progress callback"""
+    
+    def __init__(self, raw, progress):
+        self._raw = raw
+        self._progress = progress
+        self._count = 0
+    
+    def read(self, size=-1):
+        chunk = self._raw.read(size)
+        self._count += len(chunk)
+        self._progress(self._count)
+        return chunk
+
+@contextlib.contextmanager
+def open_progress_source(source, progress=None):
+    """Open a dump source as a reader that reports its progress, or as is without a callback"""
+    if progress is None:
+        yield source
+        return
+    with open_dump_source(source) as src:
+        if isinstance(src, (bytes, bytearray, memoryview, mmap.mmap)):
+            src = _BufferReader(src)
+        yield _ProgressReader(src, progress)
+
+def write_export(blocks, compress=False, suffix='.txt'):
+    """Write text blocks straight to a temp file, gzip-compressed if asked, and return its path
+
+    Only one block is held at a time, so memory stays flat however big the export.
+    """
+    tmp = tempfile.NamedTemporaryFile(prefix='hexpad-export-', suffix=suffix + ('.gz' if compress else ''), delete=False)
+    try:
+        with tmp:
+            with (gzip.GzipFile(fileobj=tmp, mode='wb', compresslevel=EXPORT_GZIP_LEVEL) if compress else contextlib.nullcontext(tmp)) as out:
+                for block in blocks:
+                    out.write(block.encode('utf-8'))
+    except BaseException:
+        # A failed or cancelled export leaves nothing behind
+        os.remove(tmp.name)
+        raise
+    return tmp.name
+
+def remove_export(path):
+    """Delete an export file that is no longer offered for download"""
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def spool_to_tempfile(fileobj, suffix='.bin'):
+    """Copy a binary file object to a named temp file and return its path"""
+    with tempfile.NamedTemporaryFile(prefix='hexpad-', suffix=suffix, delete=False) as tmp:
+        shutil.copyfileobj(fileobj, tmp, SPOOL_COPY_SIZE)
+    return tmp.name
+
+@contextlib.contextmanager
+def map_file(path):
+    """Memory-map a file read-only; empty files can't be mapped and yield b''"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+@contextlib.contextmanager
+def open_buffer(source):
+    """Yield a path memory-mapped, or a bytes-like object or mmap as is"""
+    if isinstance(source, (str, os.PathLike)):
+        with map_file(source) as data:
+            yield data
+    else:
+        yield source
+
+def line_count(size, bytes_per_line=16):
+    """Return the number of hexdump lines needed for size bytes"""
+    return -(-size // bytes_per_line)
+
+def parse_offset(text):
+    """Parse a decimal or 0x-prefixed hex byte offset"""
+    text = text.strip().replace('_', '')
+    value = int(text, 16) if text.lower().startswith('0x') else int(text)
+    if value < 0:
+        raise ValueError("Offset must not be negative")
+    return value
+
+def hexdump_window(data, first_line, num_lines, encoding='utf-8', bytes_per_line=16, squeeze=False):
+    """Render only num_lines hexdump lines starting at first_line of a byte buffer"""
+    # Line n always starts at n * bytes_per_line, so no earlier lines are touched
+    start = first_line * bytes_per_line
+    chunk = data[start:start + num_lines * bytes_per_line]
+    if squeeze:
+        # Each window starts with a full line so a page never opens with a bare '*'
+        return render_squeezed_lines(chunk, start, bytes_per_line, display_table_for(encoding))[0]
+    return render_hexdump_lines(chunk, start, bytes_per_line, display_table_for(encoding))
+
+def common_run_length(a, b, limit, from_end=False):
+    """Number of equal bytes two buffers share at their start (or end), up to limit
+
+    Equal stretches are skipped with one comparison per block, blocks growing
+    from DIFF_SUB_BLOCK_SIZE to DIFF_BLOCK_SIZE and shrinking again around a
+    difference, so only the last sub-block is walked byte by byte.
+    """
+    matched = 0
+    size = DIFF_SUB_BLOCK_SIZE
+    while matched < limit:
+        size = min(size, limit - matched)
+        if from_end:
+            block_a = a[len(a) - matched - size:len(a) - matched][::-1]
+            block_b = b[len(b) - matched - size:len(b) - matched][::-1]
+        else:
+            block_a = a[matched:matched + size]
+            block_b = b[matched:matched + size]
+        if block_a == block_b:
+            matched += size
+            size = min(2 * size, DIFF_BLOCK_SIZE)
+        elif size > DIFF_SUB_BLOCK_SIZE:
+            size //= 2
+        else:
+            return matched + next(i for i, (x, y) in enumerate(zip(block_a, block_b)) if x != y)
+    return limit
+
+def _line_bodies(data, offset, bytes_per_line, display_table):
+    """Render hexdump lines without their offset column"""
+    lines = render_hexdump_lines(data, offset, bytes_per_line, display_table)
+    bodies = []
+    start = 0
+    while start < len(lines):
+        # Lines up to the next power of ten share the width of their offset column
+        width = max(len(str(offset + start * bytes_per_line)), 6)
+        end = min(len(lines), -(-(10 ** width - offset) // bytes_per_line))
+        bodies += [line[width:] for line in lines[start:end]]
+        start = end
+    return bodies
+
+def iter_body_blocks(bodies, bytes_per_line, progress=None):
+    """Yield newline-terminated hexdump blocks from line bodies, putting their offsets back in front"""
+    for first in range(0, len(bodies), HEXDUMP_BLOCK_LINES):
+        block = bodies[first:first + HEXDUMP_BLOCK_LINES]
+        offsets = range(first * bytes_per_line, (first + len(block)) * bytes_per_line, bytes_per_line)
+        yield ''.join(map('{:<6}{}\n'.format, offsets, block))
+        if progress:
+            progress((first + len(block)) * bytes_per_line)
+
+class IncrementalHexdump:
+    """The hexdump lines of an edited buffer, reformatting only the lines an edit touches
+
+    Lines are kept without their offset column, so when an edit grows or
+    shrinks the data by whole lines the lines after it are reused as they are.
+    Any other length change shifts the bytes after the edit across line
+    boundaries, and those lines are reformatted. Every update builds a new
+    bodies list, so a snapshot of it stays valid while it is exported.
+    """
+    
+    def __init__(self, encoding='utf-8', bytes_per_line=16):
+        self.encoding = encoding
+        self.bytes_per_line = bytes_per_line
+        self.data = b''
+        self.bodies = []
+    
+    def update(self, data):
+        """Switch to the edited data and return the number of lines that were reformatted"""
+        old = self.data
+        bpl = self.bytes_per_line
+        shared = min(len(old), len(data))
+        prefix = common_run_length(old, data, shared)
+        if prefix == len(old) == len(data):
+            self.data = data
+            return 0
+        suffix = common_run_length(old, data, shared - prefix, from_end=True)
+        
+        table = display_table_for(self.encoding)
+        first = prefix // bpl
+        delta = len(data) - len(old)
+        if delta % bpl:
+            bodies = self.bodies[:first] + _line_bodies(data[first * bpl:], first * bpl, bpl, table)
+            changed = len(bodies) - first
+        else:
+            # Old lines wholly inside the unchanged tail land on whole lines again
+            keep = -(-(len(old) - suffix) // bpl)
+            end = keep + delta // bpl
+            changed_lines = _line_bodies(data[first * bpl:end * bpl], first * bpl, bpl, table)
+            bodies = self.bodies[:first] + changed_lines + self.bodies[keep:]
+            changed = len(changed_lines)
+        self.data = data
+        self.bodies = bodies
+        return changed
+    
+    def lines(self, first_line=0, num_lines=None):
+        """Hexdump lines with their offsets, like hexdump_window"""
+        end = len(self.bodies) if num_lines is None else first_line + num_lines
+        bpl = self.bytes_per_line
+        offsets = range(first_line * bpl, end * bpl, bpl)
+        return list(map('{:<6}{}'.format, offsets, self.bodies[first_line:end]))
+
+class _BufferReader:
+    """Sequential read(n) over a bytes-like object or mmap, like a binary file"""
+    
+    def __init__(self, data):
+        self._data = data
+        self._pos = 0
+    
+    def read(self, size):
+        chunk = self._data[self._pos:self._pos + size]
+        self._pos += len(chunk)
+        return chunk
+
+@contextlib.contextmanager
+def _open_record_reader(source):
+    """Open a dump source for sequential reads"""
+    with open_dump_source(source) as src:
+        if isinstance(src, (bytes, bytearray, memoryview, mmap.mmap)):
+            yield _BufferReader(src)
+        else:
+            yield src
+
+def _iter_fixed_records(reader, lrecl):
+    """Yield (offset, record) for fixed-length records; a short last record is kept"""
+    offset = 0
+    while True:
+        record = reader.read(lrecl)
+        if not record:
+            return
+        yield offset, record
+        offset += len(record)
+
+def _descriptor_length(descriptor, offset, kind):
+    """Return the length stored in a 4-byte BDW or RDW"""
+    if len(descriptor) < 4:
+        raise ValueError(f"{kind} at offset {offset} is truncated")
+    # Large blocks (over 32 KB) set the high bit and use all four bytes
+    if kind == "BDW" and descriptor[0] & 0x80:
+        return int.from_bytes(descriptor, 'big') & 0x7FFFFFFF
+    if descriptor[2] or descriptor[3]:
+        raise ValueError(f"{kind} at offset {offset} has non-zero flag bytes {bytes(descriptor[2:]).hex()} (spanned records are not supported)")
+    length = int.from_bytes(descriptor[:2], 'big')
+    if length < 4:
+        raise ValueError(f"{kind} at offset {offset} has invalid length {length}")
+    return length
+
+def _iter_variable_records(reader, blocked):
+    """Yield (offset, record) for RDW variable records, optionally grouped in BDW blocks"""
+    # Offsets point at the record data, just past its RDW
+    offset = 0
+    while True:
+        block_end = None
+        if blocked:
+            bdw = reader.read(4)
+            if not bdw:
+                return
+            block_end = offset + _descriptor_length(bdw, offset, "BDW")
+            offset += 4
+        
+        while block_end is None or offset < block_end:
+            rdw = reader.read(4)
+            if not rdw:
+                if block_end is not None:
+                    raise ValueError(f"Block ending at offset {block_end} is truncated")
+                return
+            length = _descriptor_length(rdw, offset, "RDW")
+            record = reader.read(length - 4)
+            if len(record) < length - 4:
+                raise ValueError(f"RDW at offset {offset} says {length} bytes, but the data ends first")
+            yield offset + 4, record
+            offset += length
+        
+        if offset != block_end:
+            raise ValueError(f"Record ending at offset {offset} overruns the block ending at {block_end}")
+
+def _iter_delimited_records(reader, delimiter):
+    """Yield (offset, record) for delimiter-terminated records, without the delimiter"""
+    offset = 0
+    pending = b''
+    while True:
+        chunk = reader.read(SPOOL_COPY_SIZE)
+        if not chunk:
+            break
+        records = (pending + chunk).split(delimiter)
+        pending = records.pop()
+        for record in records:
+            yield offset, record
+            offset += len(record) + len(delimiter)
+    if pending:
+        yield offset, pending
+
+def iter_records(source, record_format='fixed', lrecl=0, delimiter=b'\n'):
+    """Lazily yield (offset, record bytes) for every record of a path, binary file, mmap or bytes object"""
+    if record_format not in RECORD_FORMATS:
+        raise ValueError(f"Unknown record format {record_format!r}, expected one of {', '.join(RECORD_FORMATS)}")
+    if record_format == 'fixed' and lrecl <= 0:
+        raise ValueError("Fixed-length records need a positive LRECL")
+    
+    with _open_record_reader(source) as reader:
+        if record_format == 'fixed':
+            yield from _iter_fixed_records(reader, lrecl)
+        elif record_format == 'newline':
+            yield from _iter_delimited_records(reader, delimiter)
+        else:
+            yield from _iter_variable_records(reader, record_format == 'blocked')
+
+class RecordIndex:
+    """Start offsets of every record in a buffer, so record n is a lookup instead of a rescan"""
+    
+    def __init__(self, size, record_format='fixed', lrecl=0, delimiter=b'\n', offsets=None):
+        self.size = size
+        self.record_format = record_format
+        self.lrecl = lrecl
+        self.delimiter = delimiter
+        # Fixed records are found by arithmetic, the others keep 8 bytes per record
+        self.offsets = offsets
+    
+    @classmethod
+    def build(cls, data, record_format='fixed', lrecl=0, delimiter=b'\n', progress=None):
+        """Scan a bytes-like object or mmap once and index its records"""
+        if record_format == 'fixed':
+            if lrecl <= 0:
+                raise ValueError("Fixed-length records need a positive LRECL")
+            return cls(len(data), record_format, lrecl)
+        offsets = array.array('Q')
+        records = iter_records(data, record_format, lrecl, delimiter)
+        # Offsets are collected a batch at a time, reporting the scan position after each
+        while True:
+            size = len(offsets)
+            offsets.extend(offset for offset, _ in itertools.islice(records, RECORD_PROGRESS_RECORDS))
+            if len(offsets) == size:
+                break
+            if progress:
+                progress(offsets[-1])
+        return cls(len(data), record_format, lrecl, delimiter, offsets)
+    
+    def __len__(self):
+        if self.offsets is None:
+            return -(-self.size // self.lrecl)
+        return len(self.offsets)
+    
+    def offset(self, number):
+        """Offset of the data of record number (0-based)"""
+        if not 0 <= number < len(self):
+            raise IndexError(f"Record {number + 1} is out of range (1-{len(self)})")
+        if self.offsets is None:
+            return number * self.lrecl
+        return self.offsets[number]
+    
+    def record(self, data, number):
+        """Return (offset, bytes) of record number (0-based) from the indexed buffer"""
+        start = self.offset(number)
+        if self.record_format == 'fixed':
+            end = min(start + self.lrecl, self.size)
+        elif self.record_format == 'newline':
+            end = data.find(self.delimiter, start)
+            if end == -1:
+                end = self.size
+        else:
+            # The RDW just before the data holds the record length
+            end = start + int.from_bytes(data[start - 4:start - 2], 'big') - 4
+        return start, data[start:end]
+    
+    def find(self, offset):
+        """Number (0-based) of the record whose data starts at or before offset, or None without records"""
+        if not len(self):
+            return None
+        if self.offsets is None:
+            return min(offset // self.lrecl, len(self) - 1)
+        return max(bisect.bisect_right(self.offsets, offset) - 1, 0)
+
+def render_record_lines(number, offset, record, bytes_per_line=16, display_table=ASCII_DISPLAY_TABLE):
+    """Render a record as a header line followed by its hexdump, with offsets relative to the record"""
+    header = f"Record {number + 1}  offset {offset}  length {len(record)}"
+    return [header] + render_hexdump_lines(record, 0, bytes_per_line, display_table)
+
+def iter_record_hexdump(source, record_format='fixed', encoding='utf-8', bytes_per_line=16, lrecl=0, delimiter=b'\n'):
+    """Lazily yield newline-terminated blocks dumping every record separately"""
+    table = display_table_for(encoding)
+    lines = []
+    for number, (offset, record) in enumerate(iter_records(source, record_format, lrecl, delimiter)):
+        lines += render_record_lines(number, offset, record, bytes_per_line, table)
+        if len(lines) >= HEXDUMP_BLOCK_LINES:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def records_to_hexdump(source, record_format='fixed', encoding='utf-8', bytes_per_line=16, lrecl=0):
+    """Dump every record of a dataset separately as one string"""
+    return ''.join(iter_record_hexdump(source, record_format, encoding, bytes_per_line, lrecl))
+
+def _copybook_statements(text):
+    """Split copybook source into period-terminated statements, dropping comments and sequence areas"""
+    lines = []
+    for line in text.splitlines():
+        # Fixed-format copybooks keep sequence numbers in columns 1-6 and an indicator in 7
+        if len(line) > 6 and not line[:6].strip(' 0123456789') and line[6] in ' *-/':
+            if line[6] in '*/':
+                continue
+            line = line[7:72]
+        if line.strip().startswith('*'):
+            continue
+        lines.append(line)
+    statements = re.split(r'\.(?=\s|$)', ' '.join(lines))
+    return [statement.split() for statement in statements if statement.strip()]
+
+def _parse_picture(picture, name):
+    """Return (length, digits, scale, signed, is_text) for a PIC string"""
+    symbols = re.findall(r'([XA9SV])(?:\((\d+)\))?', picture)
+    if ''.join(symbol + (f'({count})' if count else '') for symbol, count in symbols) != picture:
+        raise ValueError(f"{name}: unsupported PIC {picture} (only X, A, 9, S and V are understood)")
+    
+    length = digits = scale = 0
+    signed = is_text = after_point = False
+    for symbol, count in symbols:
+        count = int(count or 1)
+        if symbol == 'S':
+            signed = True
+        elif symbol == 'V':
+            after_point = True
+        elif symbol == '9':
+            digits += count
+            scale += count if after_point else 0
+        else:
+            is_text = True
+        length += count if symbol in 'XA9' else 0
+    return length, digits, scale, signed, is_text
+
+def parse_copybook(text):
+    """Parse a COBOL copybook into its elementary fields with their record offsets"""
+    fields = []
+    offsets = {}
+    offset = 0
+    for tokens in _copybook_statements(text.upper()):
+        if not tokens[0].isdigit():
+            raise ValueError(f"Expected a level number, got {' '.join(tokens)!r}")
+        level = int(tokens[0])
+        # Condition names and RENAMES take no storage
+        if level in (66, 88):
+            continue
+        # The name is optional, an unnamed item is a FILLER
+        if len(tokens) > 1 and tokens[1] not in COPYBOOK_CLAUSES and tokens[1] not in COPYBOOK_USAGES:
+            name, words = tokens[1], iter(tokens[2:])
+        else:
+            name, words = 'FILLER', iter(tokens[1:])
+        
+        picture = usage = redefines = None
+        occurs = 1
+        for word in words:
+            if word in ('PIC', 'PICTURE'):
+                picture = next(words, '')
+                if picture == 'IS':
+                    picture = next(words, '')
+            elif word == 'REDEFINES':
+                redefines = next(words, '')
+            elif word == 'OCCURS':
+                occurs = int(next(words, '1'))
+            elif word in COPYBOOK_USAGES:
+                usage = COPYBOOK_USAGES[word]
+            elif word in ('COMP-1', 'COMP-2', 'COMPUTATIONAL-1', 'COMPUTATIONAL-2', 'SEPARATE', 'POINTER', 'INDEX'):
+                raise ValueError(f"{name}: {word} fields are not supported")
+        
+        if picture is None:
+            # Group items only name the fields below them
+            if redefines or occurs > 1:
+                raise ValueError(f"{name}: REDEFINES and OCCURS are only supported on elementary items")
+            continue
+        
+        length, digits, scale, signed, is_text = _parse_picture(picture, name)
+        kind = 'text' if is_text else (usage or 'zoned')
+        if kind != 'text' and digits > 18:
+            raise ValueError(f"{name}: numeric fields are limited to 18 digits")
+        if kind == 'packed':
+            length = digits // 2 + 1
+        elif kind == 'binary':
+            length = 2 if digits <= 4 else 4 if digits <= 9 else 8
+        
+        if redefines:
+            if redefines not in offsets:
+                raise ValueError(f"{name}: REDEFINES unknown field {redefines}")
+            start = offsets[redefines]
+        else:
+            start = offset
+        
+        if occurs > 1:
+            # A table can be redefined as a whole
+            offsets[name] = start
+        for i in range(occurs):
+            field_name = f"{name}({i + 1})" if occurs > 1 else name
+            # Names repeated in different groups get a numeric suffix
+            if field_name in offsets and name != 'FILLER':
+                suffix = 1
+                while f"{field_name}-{suffix}" in offsets:
+                    suffix += 1
+                field_name = f"{field_name}-{suffix}"
+            offsets[field_name] = start + i * length
+            fields.append(CopybookField(field_name, start + i * length, length, kind, digits, scale, signed))
+        if not redefines:
+            offset += occurs * length
+    
+    if not fields:
+        raise ValueError("The copybook defines no elementary fields")
+    return fields
+
+def copybook_length(fields):
+    """Record length covered by a copybook's fields"""
+    return max(field.offset + field.length for field in fields)
+
+def _copybook_dtype(fields, lrecl):
+    """NumPy structured dtype viewing each field of a fixed-length record in place"""
+    import numpy as np
+    
+    formats = []
+    for field in fields:
+        if field.kind == 'binary':
+            formats.append(('>i' if field.signed else '>u') + str(field.length))
+        else:
+            formats.append((np.uint8, (field.length,)))
+    return np.dtype({
+        'names': [f"f{i}" for i in range(len(fields))],
+        'formats': formats,
+        'offsets': [field.offset for field in fields],
+        'itemsize': lrecl
+    })
+
+def _decode_packed(column):
+    """Vectorised COMP-3 decode of an (n, length) byte array into (values, invalid)"""
+    import numpy as np
+    
+    high, low = column >> 4, column & 0x0F
+    # Every nibble is a digit except the last one, which holds the sign
+    digits = np.empty((len(column), 2 * column.shape[1] - 1), dtype=np.uint8)
+    digits[:, 0::2] = high
+    digits[:, 1::2] = low[:, :-1]
+    sign = low[:, -1]
+    
+    values = np.zeros(len(column), dtype=np.int64)
+    for i in range(digits.shape[1]):
+        values = values * 10 + digits[:, i]
+    invalid = (digits > 9).any(axis=1) | (sign < 0x0A)
+    return np.where((sign == 0x0D) | (sign == 0x0B), -values, values), invalid
+
+def _decode_zoned(column):
+    """Vectorised EBCDIC zoned decimal decode of an (n, length) byte array into (values, invalid)"""
+    import numpy as np
+    
+    zones, digits = column >> 4, column & 0x0F
+    values = np.zeros(len(column), dtype=np.int64)
+    for i in range(column.shape[1]):
+        values = values * 10 + digits[:, i]
+    # All zones are F except the last, whose zone carries the sign
+    invalid = (digits > 9).any(axis=1) | (zones[:, :-1] != 0x0F).any(axis=1) | (zones[:, -1] < 0x0A)
+    return np.where((zones[:, -1] == 0x0D) | (zones[:, -1] == 0x0B), -values, values), invalid
+
+def _decode_text(column, encoding):
+    """Decode an (n, length) byte array into an array of strings"""
+    import numpy as np
+    
+    count, length = column.shape
+    text = column.tobytes().decode(resolve_encoding(encoding), errors='replace')
+    if len(text) == count * length:
+        # Single-byte codepages: reinterpret the decoded text as fixed-width strings
+        return np.frombuffer(text.encode('utf-32-le'), dtype=f'<U{length}') if count else np.array([], dtype=str)
+    return np.array([bytes(row).decode(resolve_encoding(encoding), errors='replace') for row in column])
+
+def decode_copybook_records(data, fields, lrecl, encoding='cp037', first=0, count=None):
+    """Decode every field of count fixed-length records from first on, one NumPy operation per field
+
+    Returns a (values, invalid) pair per field: strings for text fields and
+    unscaled int64 values for numeric ones, with invalid marking records
+    whose bytes aren't a valid number (invalid is None for text fields).
+    """
+    import numpy as np
+    
+    if copybook_length(fields) > lrecl:
+        raise ValueError(f"The copybook covers {copybook_length(fields)} bytes, more than the LRECL of {lrecl}")
+    available = max(len(data) // lrecl - first, 0)
+    count = available if count is None else min(count, available)
+    
+    # A view over the record buffer, nothing is copied until a field is decoded
+    records = np.frombuffer(data, dtype=_copybook_dtype(fields, lrecl), count=count, offset=first * lrecl)
+    columns = []
+    for i, field in enumerate(fields):
+        column = records[f"f{i}"]
+        if field.kind == 'text':
+            columns.append((_decode_text(column, encoding), None))
+        elif field.kind == 'binary':
+            columns.append((column.astype(np.int64), np.zeros(count, dtype=bool)))
+        elif field.kind == 'packed':
+            columns.append(_decode_packed(column))
+        else:
+            columns.append(_decode_zoned(column))
+    del records
+    return columns
+
+def format_copybook_column(field, values, invalid):
+    """Format decoded values as a list of strings, None where the bytes were invalid"""
+    import numpy as np
+    
+    if field.kind == 'text':
+        return values.tolist()
+    if field.scale:
+        # Exact decimals: split off the fraction with integer arithmetic
+        whole, fraction = np.divmod(np.abs(values), 10 ** field.scale)
+        signs = np.where(values < 0, '-', '')
+        text = np.char.add(np.char.add(signs, whole.astype(str)), np.char.add('.', np.char.zfill(fraction.astype(str), field.scale)))
+    else:
+        text = values.astype(str)
+    return [None if bad else value for value, bad in zip(text.tolist(), invalid.tolist())]
+
+def iter_copybook_csv(data, fields, lrecl, encoding='cp037', progress=None):
+    """Lazily yield CSV text of every record's decoded fields, a batch of records at a time"""
+    names = [field.name for field in fields if field.name != 'FILLER']
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["RECORD"] + names)
+    
+    total = len(data) // lrecl
+    for first in range(0, total, COPYBOOK_BATCH_RECORDS):
+        columns = decode_copybook_records(data, fields, lrecl, encoding, first, COPYBOOK_BATCH_RECORDS)
+        formatted = [format_copybook_column(field, *column) for field, column in zip(fields, columns) if field.name != 'FILLER']
+        writer.writerows(zip(range(first + 1, first + COPYBOOK_BATCH_RECORDS + 1), *formatted))
+        if progress:
+            progress(min(first + COPYBOOK_BATCH_RECORDS, total) * lrecl)
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    if total == 0:
+        yield out.getvalue()
+
+def copybook_to_csv(source, fields, lrecl, encoding='cp037'):
+    """Decode every record of a path or buffer into one CSV string"""
+    with open_buffer(source) as data:
+        return ''.join(iter_copybook_csv(data, fields, lrecl, encoding))
+
+def _iter_block_differences(block_a, block_b, base):
+    """Yield (start, end) runs of differing bytes between two equal-length blocks"""
+    for sub in range(0, len(block_a), DIFF_SUB_BLOCK_SIZE):
+        sub_a = block_a[sub:sub + DIFF_SUB_BLOCK_SIZE]
+        sub_b = block_b[sub:sub + DIFF_SUB_BLOCK_SIZE]
+        if sub_a == sub_b:
+            continue
+        
+        # Only differing sub-blocks are walked byte by byte
+        run = None
+        for i, (x, y) in enumerate(zip(sub_a, sub_b), base + sub):
+            if x != y:
+                if run is None:
+                    run = i
+            elif run is not None:
+                yield run, i
+                run = None
+        if run is not None:
+            yield run, base + sub + len(sub_a)
+
+def iter_diff_ranges(a, b, block_size=DIFF_BLOCK_SIZE, progress=None):
+    """Yield the (start, end) byte ranges where two buffers differ, comparing them block by block
+
+    Identical blocks cost a single memcmp. Bytes past the end of the shorter
+    buffer count as different.
+    """
+    common = min(len(a), len(b))
+    pending = None
+    for pos in range(0, common, block_size):
+        end = min(pos + block_size, common)
+        if progress:
+            progress(pos)
+        # bytes compare with memcmp, memoryviews would compare item by item
+        block_a, block_b = bytes(a[pos:end]), bytes(b[pos:end])
+        if block_a == block_b:
+            continue
+        for run in _iter_block_differences(block_a, block_b, pos):
+            # Runs touching across a block boundary are one range
+            if pending and pending[1] == run[0]:
+                pending = (pending[0], run[1])
+                continue
+            if pending:
+                yield pending
+            pending = run
+    
+    if len(a) != len(b):
+        if pending and pending[1] == common:
+            pending = (pending[0], max(len(a), len(b)))
+        else:
+            if pending:
+                yield pending
+            pending = (common, max(len(a), len(b)))
+    if pending:
+        yield pending
+
+def iter_diff_hunks(ranges, size, bytes_per_line=16, context=DIFF_CONTEXT_LINES, max_lines=DIFF_MAX_HUNK_LINES):
+    """Group differing byte ranges into (first_line, end_line) hunks of whole lines with some context"""
+    total_lines = line_count(size, bytes_per_line)
+    hunk = None
+    for start, end in ranges:
+        first = max(start // bytes_per_line - context, 0)
+        last = min((end - 1) // bytes_per_line + 1 + context, total_lines)
+        if hunk and first <= hunk[1]:
+            hunk[1] = max(hunk[1], last)
+            continue
+        if hunk:
+            yield from ((i, min(i + max_lines, hunk[1])) for i in range(hunk[0], hunk[1], max_lines))
+        hunk = [first, last]
+    # Long stretches of changes are split so no hunk gets too big to show
+    if hunk:
+        yield from ((i, min(i + max_lines, hunk[1])) for i in range(hunk[0], hunk[1], max_lines))
+
+def summarize_diff(a, b, bytes_per_line=16, max_hunks=DIFF_MAX_HUNKS, progress=None):
+    """Compare two buffers completely, returning the first max_hunks hunks, how many more there are,
+    and the number of differing bytes and ranges
+    """
+    totals = {"bytes": 0, "ranges": 0}
+    def counted(ranges):
+        for start, end in ranges:
+            totals["bytes"] += end - start
+            totals["ranges"] += 1
+            yield start, end
+    
+    hunks = iter_diff_hunks(counted(iter_diff_ranges(a, b, progress=progress)), max(len(a), len(b)), bytes_per_line)
+    kept = list(itertools.islice(hunks, max_hunks))
+    # The rest is still scanned so the totals cover the whole buffers
+    dropped = sum(1 for _ in hunks)
+    return kept, dropped, totals["bytes"], totals["ranges"]
+
+def render_diff_rows(a, b, first_line, end_line, bytes_per_line=16, display_table=ASCII_DISPLAY_TABLE):
+    """Render lines first_line .. end_line of two buffers side by side
+
+    Returns a (left, right, changed) tuple per line, changed listing the
+    positions within the line of bytes that differ or exist on one side only.
+    """
+    start = first_line * bytes_per_line
+    chunk_a = bytes(a[start:end_line * bytes_per_line])
+    chunk_b = bytes(b[start:end_line * bytes_per_line])
+    left = render_hexdump_lines(chunk_a, start, bytes_per_line, display_table)
+    right = render_hexdump_lines(chunk_b, start, bytes_per_line, display_table)
+    
+    rows = []
+    for i in range(end_line - first_line):
+        row_a = chunk_a[i * bytes_per_line:(i + 1) * bytes_per_line]
+        row_b = chunk_b[i * bytes_per_line:(i + 1) * bytes_per_line]
+        changed = []
+        if row_a != row_b:
+            changed = [j for j in range(max(len(row_a), len(row_b))) if row_a[j:j + 1] != row_b[j:j + 1]]
+        rows.append((left[i] if i < len(left) else '', right[i] if i < len(right) else '', changed))
+    return rows
+
+def iter_diff_text(source_a, source_b, encoding='utf-8', bytes_per_line=16, progress=None):
+    """Lazily yield a side-by-side text diff of two dump sources, one hunk at a time
+
+    Changed lines are marked with '|' between the two sides, like sdiff.
+    """
+    table = display_table_for(encoding)
+    with open_buffer(source_a) as a, open_buffer(source_b) as b:
+        size = max(len(a), len(b))
+        for first_line, end_line in iter_diff_hunks(iter_diff_ranges(a, b), size, bytes_per_line):
+            rows = render_diff_rows(a, b, first_line, end_line, bytes_per_line, table)
+            width = max(len(left) for left, _, _ in rows)
+            lines = [f"@@ offsets {first_line * bytes_per_line}-{min(end_line * bytes_per_line, size)} @@"]
+            lines += [f"{left:<{width}}  {'|' if changed else ' '}  {right}".rstrip() for left, right, changed in rows]
+            if progress:
+                progress(min(end_line * bytes_per_line, size))
+            yield '\n'.join(lines) + '\n'
+
+def diff_to_text(source_a, source_b, encoding='utf-8', bytes_per_line=16):
+    """Side-by-side text diff of two dump sources as one string"""
+    return ''.join(iter_diff_text(source_a, source_b, encoding, bytes_per_line))
+
+def export_hexdump(source, encoding='utf-8', bytes_per_line=16, squeeze=False, output_format='hexpad',
+                   compress=False, progress=None, name='data'):
+    """Write the hexdump of a dump source in any output format to an export file and return its path"""
+    suffix = get_output_format(output_format).extension
+    with open_progress_source(source, progress) as src:
+        return write_export(iter_hexdump(src, encoding, bytes_per_line, squeeze, output_format, name), compress, suffix)
+
+def export_hexdump_bodies(bodies, bytes_per_line=16, compress=False, progress=None):
+    """Write the line bodies of an IncrementalHexdump, offsets put back, to an export file and return its path"""
+    return write_export(iter_body_blocks(bodies, bytes_per_line, progress), compress)
+
+def export_records(source, record_format='fixed', encoding='utf-8', bytes_per_line=16, lrecl=0, compress=False, progress=None):
+    """Write every record of a dataset dumped separately to an export file and return its path"""
+    with open_progress_source(source, progress) as src:
+        return write_export(iter_record_hexdump(src, record_format, encoding, bytes_per_line, lrecl), compress)
+
+def export_copybook_csv(source, fields, lrecl, encoding='cp037', compress=False, progress=None):
+    """Write every record's decoded fields to a CSV export file and return its path"""
+    with open_buffer(source) as data:
+        return write_export(iter_copybook_csv(data, fields, lrecl, encoding, progress), compress, '.csv')
+
+def export_text(hex_input, encoding='utf-8', input_format=None, compress=False, progress=None):
+    """Write the text of hex bytes, or of a dump in one of OUTPUT_FORMATS, to a UTF-8 export file and return its path"""
+    return write_export(iter_hex_input_text(hex_input, encoding, input_format, progress=progress), compress)
+
+def export_diff(source_a, source_b, encoding='utf-8', bytes_per_line=16, compress=False, progress=None):
+    """Write the side-by-side diff of two dump sources to an export file and return its path"""
+    return write_export(iter_diff_text(source_a, source_b, encoding, bytes_per_line, progress), compress)
+
+def compile_search(pattern, mode='text', encoding='utf-8'):
+    """Compile a hex, text or byte regex search pattern into (regex, overlap)
+
+    Text is encoded with the dump's codepage first, so an ASCII string is
+    found inside EBCDIC data. overlap is how many bytes before a chunk
+    boundary a match may start and still run into the next chunk.
+    """
+    if mode == 'hex':
+        try:
+            needle = bytes.fromhex(re.sub(r'0[xX]', '', pattern))
+        except ValueError:
+            raise ValueError("Hex pattern must be pairs of hex digits, e.g. 'c1 c2 c3'")
+    elif mode == 'text':
+        needle = pattern.encode(resolve_encoding(encoding))
+    elif mode == 'regex':
+        # Escapes like \x40 stay escapes, the regex itself runs over raw bytes
+        try:
+            regex = re.compile(pattern.encode('latin-1', errors='backslashreplace'), re.DOTALL)
+        except re.error as e:
+            raise ValueError(f"Invalid regex: {e}")
+        return regex, SEARCH_REGEX_OVERLAP
+    else:
+        raise ValueError(f"Unknown search mode {mode!r}, expected one of {', '.join(SEARCH_MODES)}")
+    
+    if not needle:
+        raise ValueError("Search pattern is empty")
+    return re.compile(re.escape(needle)), len(needle) - 1
+
+def iter_search(source, regex, overlap, chunk_size=SEARCH_CHUNK_SIZE, progress=None):
+    """Yield (offset, length) of every match in a dump source, scanning it chunk by chunk
+
+    The last overlap bytes of each chunk are searched again together with the
+    next chunk, so matches spanning a boundary are found exactly once.
+    """
+    carry = b''
+    base = 0
+    resume = 0
+    for chunk in iter_source_chunks(source, chunk_size):
+        if progress:
+            progress(base + len(carry))
+        window = carry + bytes(chunk)
+        # Matches starting this close to the end might continue in the next chunk
+        limit = len(window) - overlap
+        for match in regex.finditer(window, resume - base):
+            if match.start() >= limit:
+                break
+            yield base + match.start(), match.end() - match.start()
+            resume = base + max(match.end(), match.start() + 1)
+        
+        keep = max(limit, 0)
+        carry = window[keep:]
+        base += keep
+    
+    for match in regex.finditer(carry, max(resume - base, 0)):
+        yield base + match.start(), match.end() - match.start()
+
+def search_matches(source, pattern, mode='text', encoding='utf-8', limit=SEARCH_MAX_MATCHES, progress=None):
+    """Offsets and lengths of the first limit matches of a search pattern in a dump source"""
+    regex, overlap = compile_search(pattern, mode, encoding)
+    return list(itertools.islice(iter_search(source, regex, overlap, progress=progress), limit))
+
+def stats_block_size(size):
+    """Entropy map block size for an input of size bytes, a power of two of at least STATS_MIN_BLOCK_SIZE"""
+    wanted = -(-size // STATS_MAX_BLOCKS)
+    return max(STATS_MIN_BLOCK_SIZE, 1 << (wanted - 1).bit_length())
+
+def _sample_windows(start, end, windows=STATS_SAMPLE_WINDOWS, window_bytes=STATS_SAMPLE_BYTES):
+    """Byte ranges sampled from the block start .. end, spread evenly over it"""
+    if end - start <= windows * window_bytes:
+        return [(start, end)]
+    step = (end - start - window_bytes) // (windows - 1)
+    return [(lo, lo + window_bytes) for lo in range(start, end - window_bytes + 1, step)][:windows]
+
+def shannon_entropy(counts):
+    """Shannon entropy in bits per byte of every row of a (blocks, 256) byte count array"""
+    import numpy as np
+    
+    totals = counts.sum(axis=-1, keepdims=True)
+    p = counts / np.maximum(totals, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.where(p > 0, np.log2(p), 0.0)
+    # 0.0 minus keeps uniform blocks at 0.0 rather than -0.0
+    return 0.0 - (p * logs).sum(axis=-1)
+
+def printable_mask(encoding):
+    """Boolean array of the byte values shown as a character, not '.', in the dump's text column"""
+    import numpy as np
+    
+    mask = np.frombuffer(display_table_for(encoding), dtype=np.uint8) != 0x2E
+    # The byte that really is a '.' is printable too
+    try:
+        dot = '.'.encode(resolve_encoding(encoding))
+    except (LookupError, UnicodeError):
+        dot = b'.'
+    if len(dot) == 1:
+        mask[dot[0]] = True
+    return mask
+
+# Byte statistics of a dump source: its size, a 256-entry histogram, the
+# entropy map block size and per-block entropy, whether blocks were sampled
+# and how many bytes were counted
+ByteStats = collections.namedtuple('ByteStats', 'size histogram block_size entropy sampled scanned')
+
+def byte_stats(source, block_size=None, sample=None, progress=None):
+    """Count the byte values of a path, bytes-like object or mmap, in total and per entropy map block
+
+    Every block is counted with np.bincount over a view of the buffer, so no
+    byte goes through Python. With sample, only STATS_SAMPLE_WINDOWS windows of
+    every block are read; None samples inputs of STATS_SAMPLE_THRESHOLD or more.
+    """
+    import numpy as np
+    
+    with open_buffer(source) as data:
+        size = len(data)
+        block_size = block_size or stats_block_size(size)
+        if sample is None:
+            sample = size >= STATS_SAMPLE_THRESHOLD
+        sample = bool(sample) and block_size > STATS_SAMPLE_WINDOWS * STATS_SAMPLE_BYTES
+        
+        counts = np.zeros((-(-size // block_size), 256), dtype=np.int64)
+        for i, start in enumerate(range(0, size, block_size)):
+            end = min(start + block_size, size)
+            for lo, hi in _sample_windows(start, end) if sample else [(start, end)]:
+                counts[i] += np.bincount(np.frombuffer(data, dtype=np.uint8, count=hi - lo, offset=lo), minlength=256)
+            if progress:
+                progress(end)
+    
+    histogram = counts.sum(axis=0)
+    return ByteStats(size, histogram, block_size, shannon_entropy(counts), sample, int(histogram.sum()))
+
+# Result of encoding auto-detection: the best codec, how sure that is (0-1)
+# and the score of every candidate
+EncodingGuess = collections.namedtuple('EncodingGuess', 'encoding confidence scores')
+
+def score_encodings(sample, candidates=DETECT_ENCODINGS):
+    """Score how much a byte sample reads as text in every candidate codec, through one byte histogram
+
+    A codec's score is the mean weight of the sample's bytes in it. The
+    confidence is the best score times its lead over the runner-up, measured
+    on the bytes the two weigh differently, so codepages that read the sample
+    alike don't count as rivals.
+    """
+    import numpy as np
+    
+    counts = np.bincount(np.frombuffer(sample, dtype=np.uint8), minlength=256)
+    total = int(counts.sum())
+    if not total:
+        return EncodingGuess(candidates[0], 0.0, {codec: 0.0 for codec in candidates})
+    
+    weights = np.array([DETECT_WEIGHTS[codec] for codec in candidates])
+    high = int(counts[0x80:].sum())
+    if 'utf-8' in candidates and high:
+        # Bytes dropped by a lenient decode are the ones in invalid sequences
+        invalid = len(sample) - len(bytes(sample).decode('utf-8', 'ignore').encode('utf-8'))
+        weights[candidates.index('utf-8'), 0x80:] = (high - 2 * invalid) / high
+    
+    scores = weights @ counts / total
+    best = int(np.argmax(scores))
+    differs = (weights != weights[best]) & (counts > 0)
+    differing = (differs * counts).sum(axis=1)
+    lead = ((weights[best] - weights) * differs * counts).sum(axis=1) / np.maximum(differing, 1)
+    rivals = differing > 0
+    margin = lead[rivals][np.argmax(scores[rivals])] if rivals.any() else DETECT_CLEAR_MARGIN
+    confidence = min(max(scores[best], 0.0), 1.0) * min(max(margin / DETECT_CLEAR_MARGIN, 0.0), 1.0)
+    return EncodingGuess(candidates[best], float(confidence), dict(zip(candidates, scores.tolist())))
+
+def detect_encoding(source, candidates=DETECT_ENCODINGS):
+    """Guess the codec of a path, bytes-like object or mmap from windows spread over it"""
+    with open_buffer(source) as data:
+        windows = _sample_windows(0, len(data), DETECT_SAMPLE_WINDOWS, DETECT_SAMPLE_BYTES)
+        sample = b''.join(data[lo:hi] for lo, hi in windows)
+    return score_encodings(sample, candidates)
+
+def sanitize_hex(hex_input):
+    """Drop everything but hex digits from a hex string (or bytes) in a single pass"""
+    if isinstance(hex_input, str):
+        # Non-ASCII characters can't be hex digits, so dropping them here is safe
+        hex_input = hex_input.encode('ascii', errors='ignore')
+    return hex_input.translate(None, NON_HEX_BYTES)
+
+# Invalid byte ranges found by the decoder currently running on this thread
+_decode_error_sink = threading.local()
+
+def _record_decode_error(exc):
+    """Codec error handler that notes the invalid byte range and substitutes U+FFFD"""
+    sink = getattr(_decode_error_sink, 'ranges', None)
+    if sink is not None:
+        sink.append((exc.start, exc.end))
+    return '\ufffd', exc.end
+
+codecs.register_error('hexpad-record', _record_decode_error)
+
+def iter_decode_bytes(chunks, encoding='utf-8', errors=None):
+    """Incrementally decode byte chunks, appending the (start, end) offsets of invalid sequences to errors"""
+    decoder = codecs.getincrementaldecoder(resolve_encoding(encoding))('hexpad-record')
+    consumed = 0
+    for data, final in itertools.chain(((chunk, False) for chunk in chunks), [(b'', True)]):
+        # Offsets reported by the codec include bytes buffered from the previous
+        # chunk, e.g. the first half of a UTF-8 sequence split across chunks
+        base = consumed - len(decoder.getstate()[0])
+        ranges = _decode_error_sink.ranges = []
+        try:
+            text = decoder.decode(data, final)
+        finally:
+            _decode_error_sink.ranges = None
+        
+        if errors is not None:
+            errors.extend((base + start, base + end) for start, end in ranges)
+        consumed += len(data)
+        if text:
+            yield text
+
+def iter_hex_bytes(chunks):
+    """Turn chunks of hex text into chunks of bytes, carrying an odd digit over to the next chunk"""
+    carry = b''
+    for chunk in chunks:
+        digits = carry + sanitize_hex(chunk)
+        cut = len(digits) & ~1
+        carry = digits[cut:]
+        yield binascii.unhexlify(digits[:cut])
+    if carry:
+        raise ValueError("Hex string must have even number of characters")
+
+def _progress_chunks(text, size, progress=None):
+    """Yield size-character pieces of text, reporting the characters passed on after each"""
+    for i in range(0, len(text), size):
+        if progress:
+            progress(i)
+        yield text[i:i + size]
+
+def iter_hex_input_text(hex_input, encoding='utf-8', input_format=None, errors=None, timer=None, progress=None):
+    """Yield the text of hex bytes, or of a dump in one of OUTPUT_FORMATS, a piece at a time
+
+    The byte ranges that fail to decode are appended to errors.
+    """
+    if input_format:
+        data = iter_parse_format(_progress_lines(hex_input, progress) if progress else hex_input, input_format)
+    else:
+        data = iter_hex_bytes(_progress_chunks(hex_input, HEX_DECODE_CHUNK, progress))
+    return _timed(timer, "decode", iter_decode_bytes(_timed(timer, "parse", data), encoding, errors))
+
+def iter_encode_text(pieces, encoding='utf-8'):
+    """Incrementally encode text pieces, replacing characters the encoding can't represent"""
+    encoder = codecs.getincrementalencoder(resolve_encoding(encoding))('replace')
+    for piece in pieces:
+        yield encoder.encode(piece)
+    yield encoder.encode('', True)
+
+def decode_hex(hex_input, encoding='utf-8', timer=None, progress=None):
+    """Convert a hex string to text, returning the text and the byte ranges that failed to decode"""
+    errors = []
+    text = ''.join(iter_hex_input_text(hex_input, encoding, None, errors, timer, progress))
+    return text, errors
+
+def convert_hex_input(hex_input, encoding='utf-8', input_format=None, timer=None, progress=None):
+    """Decode hex bytes or a dump to text and encode it again, returning the text's bytes and the ranges that failed to decode
+
+    The text itself is never held in one piece.
+    """
+    errors = []
+    pieces = iter_hex_input_text(hex_input, encoding, input_format, errors, timer, progress)
+    data = b''.join(_timed(timer, "encode", iter_encode_text(pieces, encoding)))
+    return data, errors
+
+def hex_to_text(hex_input, encoding='utf-8'):
+    """Convert hex string to text"""
+    try:
+        # Clean hex input
+        hex_clean = sanitize_hex(hex_input)
+        
+        if len(hex_clean) % 2 != 0:
+            return "Error: Hex string must have even number of characters"
+        
+        # Convert to bytes
+        byte_data = binascii.unhexlify(hex_clean)
+        
+        # Convert to text
+        return byte_data.decode(resolve_encoding(encoding))
+            
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def _iter_line_batches(source):
+    """Yield lists of text lines from a string, line iterable or text/binary file object"""
+    lines = iter(io.StringIO(source) if isinstance(source, str) else source)
+    while True:
+        batch = list(itertools.islice(lines, HEXDUMP_BLOCK_LINES))
+        if not batch:
+            return
+        if isinstance(batch[0], (bytes, bytearray)):
+            batch = [line.decode('latin-1') for line in batch]
+        yield batch
+
+def _split_hexpad_line(line):
+    """Split a hexpad line into its offset and hex column; a bare offset has no hex column"""
+    offset_str = line.split(' ', 1)[0]
+    if line == offset_str:
+        return offset_str, None
+    
+    # The hex column starts after the offset padded to 6 plus two spaces and
+    # ends at the first '|', which can only be the ASCII column's opening bar
+    start = max(len(offset_str), 6) + 2
+    end = line.find('|', start)
+    if line[start - 2:start] != '  ' or end < 0:
+        raise ValueError("not in hexdump layout")
+    return offset_str, line[start:end]
+
+def _split_xxd_line(line):
+    """Split an xxd line into its offset and hex column"""
+    colon = line.find(': ')
+    # The text column is separated by two spaces, the hex groups by one
+    end = line.find('  ', colon + 2)
+    if colon < 0 or end < 0:
+        raise ValueError("not in xxd layout")
+    return line[:colon], line[colon + 2:end]
+
+def _split_od_line(line):
+    """Split an `od -A x -t x1z` line into its offset and hex column; a bare offset has no hex column"""
+    offset_str = line.split(' ', 1)[0]
+    if line == offset_str:
+        return offset_str, None
+    end = line.find('  >')
+    if end < 0:
+        raise ValueError("not in od layout")
+    return offset_str, line[len(offset_str) + 1:end]
+
+def _split_canonical_line(line):
+    """Split a canonical `hexdump -C` line into its offset and hex column; a bare offset has no hex column"""
+    offset_str = line.split(' ', 1)[0]
+    if line == offset_str:
+        return offset_str, None
+    end = line.find('|')
+    if line[len(offset_str):len(offset_str) + 2] != '  ' or end < 0:
+        raise ValueError("not in hexdump -C layout")
+    return offset_str, line[len(offset_str) + 2:end]
+
+def _hexpad_columns(line):
+    """Cheap split of a hexpad line for the bulk path, whose offset checks catch what it lets through"""
+    # Everything before the first '|' is the offset followed by the hex column;
+    # without one the line is left to the strict parser
+    end = line.find('|')
+    if end < 0:
+        raise ValueError("not in hexdump layout")
+    return line[:end].split(None, 1)
+
+# How to read the lines of each line-based dump format: offset base, strict
+# column splitter and the splitter the bulk path uses
+HexLayout = collections.namedtuple('HexLayout', 'base split columns')
+HEXPAD_LAYOUT = HexLayout(10, _split_hexpad_line, _hexpad_columns)
+XXD_LAYOUT = HexLayout(16, _split_xxd_line, _split_xxd_line)
+OD_LAYOUT = HexLayout(16, _split_od_line, _split_od_line)
+CANONICAL_LAYOUT = HexLayout(16, _split_canonical_line, _split_canonical_line)
+
+def _parse_line_offset(offset_str, lineno, layout):
+    """Parse the offset of a dump line in the layout's base"""
+    try:
+        return int(offset_str, layout.base)
+    except ValueError:
+        raise ValueError(f"Line {lineno}: invalid offset {offset_str!r}") from None
+
+def _parse_hexdump_line(line, lineno, expected, layout=HEXPAD_LAYOUT):
+    """Decode a single hexdump line, checking its layout and offset"""
+    try:
+        offset_str, hex_column = layout.split(line)
+    except ValueError as e:
+        raise ValueError(f"Line {lineno}: {e}") from None
+    offset = _parse_line_offset(offset_str, lineno, layout)
+    if offset != expected:
+        raise ValueError(f"Line {lineno}: offset {offset} does not continue from {expected}")
+    if hex_column is None:
+        # A bare offset, as squeezed dumps end with, only marks the total length
+        return b''
+    try:
+        return bytes.fromhex(hex_column)
+    except ValueError:
+        raise ValueError(f"Line {lineno}: invalid hex bytes") from None
+
+def _parse_hexdump_batch(lines, expected, layout=HEXPAD_LAYOUT):
+    """Decode a batch of well-formed hexdump lines in bulk, or return None if any line needs a closer look"""
+    try:
+        columns = [layout.columns(line) for line in lines]
+    except ValueError:
+        return None
+    if any(len(c) != 2 or c[1] is None for c in columns):
+        return None
+    try:
+        offsets = [int(c[0], layout.base) for c in columns]
+    except ValueError:
+        return None
+    
+    # Every offset must equal the previous one plus the previous line's byte count
+    hex_columns = [c[1] for c in columns]
+    digits = [len(h) - h.count(' ') for h in hex_columns]
+    if any(d & 1 for d in digits):
+        return None
+    if offsets != list(itertools.accumulate((d >> 1 for d in digits[:-1]), initial=expected)):
+        return None
+    try:
+        return bytes.fromhex(''.join(hex_columns))
+    except ValueError:
+        return None
+
+def _parse_hexdump_lines(lines, expected, first_lineno, layout=HEXPAD_LAYOUT):
+    """Decode consecutive hexdump lines, in bulk unless one of them is malformed"""
+    data = _parse_hexdump_batch(lines, expected, layout)
+    if data is None:
+        # Walk the lines one by one to find (and report) the odd one out
+        data = bytearray()
+        for i, line in enumerate(lines, first_lineno):
+            line = line.rstrip('\r\n')
+            if line.strip():
+                data += _parse_hexdump_line(line, i, expected + len(data), layout)
+    return data
+
+def _expand_squeezed(lines, first_lineno, repeated, expected, layout=HEXPAD_LAYOUT):
+    """Return the copies of the repeated line a '*' stood for, up to the offset of the line after it"""
+    for lineno, line in enumerate(lines, first_lineno):
+        if line.strip():
+            break
+    else:
+        return None
+    
+    try:
+        offset_str = layout.split(line.rstrip('\r\n'))[0]
+    except ValueError as e:
+        raise ValueError(f"Line {lineno}: {e}") from None
+    offset = _parse_line_offset(offset_str, lineno, layout)
+    if offset < expected or (offset - expected) % len(repeated):
+        raise ValueError(f"Line {lineno}: offset {offset} does not continue the '*' run from {expected}")
+    return repeated * ((offset - expected) // len(repeated))
+
+def iter_parse_hexdump(source, layout=HEXPAD_LAYOUT):
+    """Yield the raw bytes of a hexdump in format_hex_line layout (or another HexLayout), one batch of lines at a time
+
+    A '*' line (from squeezed dumps) repeats the line before it up to the
+    offset of the next line.
+    """
+    expected = 0
+    lineno = 0
+    last_line = None
+    star = None
+    repeated = b''
+    for batch in _iter_line_batches(source):
+        data = bytearray()
+        start = 0
+        # Lines between '*' lines are still parsed in bulk
+        stars = [i for i, line in enumerate(batch) if line[:1] == '*']
+        for end in stars + [len(batch)]:
+            segment = batch[start:end]
+            first_lineno = lineno + start + 1
+            if star is not None:
+                copies = _expand_squeezed(segment, first_lineno, repeated, expected + len(data), layout)
+                if copies is not None:
+                    data += copies
+                    star = None
+            data += _parse_hexdump_lines(segment, expected + len(data), first_lineno, layout)
+            
+            # Remember the last hex line, it's the one a following '*' repeats
+            for i in range(len(segment) - 1, -1, -1):
+                if segment[i].strip():
+                    last_line = (first_lineno + i, segment[i].rstrip('\r\n'))
+                    break
+            if end < len(batch) and star is None:
+                star = lineno + end + 1
+                if last_line is not None:
+                    offset = _parse_line_offset(layout.split(last_line[1])[0], last_line[0], layout)
+                    repeated = _parse_hexdump_line(last_line[1], last_line[0], offset, layout)
+                if last_line is None or not repeated:
+                    raise ValueError(f"Line {star}: '*' without a line to repeat")
+            start = end + 1
+        
+        lineno += len(batch)
+        expected += len(data)
+        yield data
+    
+    if star is not None:
+        raise ValueError(f"Line {star}: '*' is not followed by the offset where the run ends")
+
+def iter_parse_c_array(source):
+    """Yield the raw bytes of a C or Python array of 0x literals, one batch of lines at a time
+
+    Declarations, brackets and commas are ignored, so xxd -i output parses too.
+    """
+    for batch in _iter_line_batches(source):
+        yield bytes.fromhex(''.join(C_BYTE_PATTERN.findall(''.join(batch))))
+
+def iter_parse_base64(source):
+    """Yield the raw bytes of base64 text, one batch of lines at a time"""
+    lineno = 0
+    carry = ''
+    for batch in _iter_line_batches(source):
+        # Only whole 4-character groups decode, the rest waits for the next batch
+        text = carry + ''.join(''.join(batch).split())
+        cut = len(text) - len(text) % 4
+        try:
+            data = binascii.a2b_base64(text[:cut], strict_mode=True)
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"Lines {lineno + 1}-{lineno + len(batch)}: invalid base64 ({e})") from None
+        carry = text[cut:]
+        lineno += len(batch)
+        yield data
+    
+    if carry:
+        raise ValueError(f"Line {lineno}: base64 data is truncated")
+
+def iter_parse_format(source, input_format='hexpad'):
+    """Yield the raw bytes of a dump written in one of OUTPUT_FORMATS"""
+    return get_output_format(input_format).parse(source)
+
+def parse_hexdump_to(source, out, timer=None, input_format='hexpad'):
+    """Decode a hexdump straight into a binary stream and return the number of bytes written"""
+    written = 0
+    buf = bytearray()
+    for data in _timed(timer, "parse", iter_parse_format(source, input_format)):
+        buf += data
+        if len(buf) >= SPOOL_COPY_SIZE:
+            out.write(buf)
+            written += len(buf)
+            buf.clear()
+    out.write(buf)
+    return written + len(buf)
+
+def parse_hexdump_bytes(source):
+    """Parse hexdump output back to the original bytes"""
+    buf = bytearray()
+    for data in iter_parse_hexdump(source):
+        buf += data
+    return bytes(buf)
+
+def parse_hexdump(hexdump_text):
+    """Parse hexdump output back to a hex string"""
+    return parse_hexdump_bytes(hexdump_text).hex()
+
+def _progress_lines(text, progress):
+    """Iterate over the lines of text, reporting the characters passed on after every batch of lines"""
+    lines = io.StringIO(text)
+    done = 0
+    while True:
+        batch = lines.readlines(HEX_DECODE_CHUNK)
+        if not batch:
+            return
+        progress(done)
+        yield from batch
+        done += sum(map(len, batch))
+
+def decode_hexdump(hexdump_text, encoding='utf-8', timer=None, input_format='hexpad', progress=None):
+    """Convert hexdump output to text, returning the text and the byte ranges that failed to decode"""
+    errors = []
+    text = ''.join(iter_hex_input_text(hexdump_text, encoding, input_format, errors, timer, progress))
+    return text, errors
+
+def hexdump_to_text(hexdump_text, encoding='utf-8'):
+    """Convert hexdump output back to text"""
+    try:
+        return parse_hexdump_bytes(hexdump_text).decode(resolve_encoding(encoding))
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def _no_lines(*args):
+    """Header or footer of formats that have none"""
+    return []
+
+def _hexpad_footer(size, squeeze, name):
+    """Squeezed dumps end with the total length, as a '*' may hide the last lines"""
+    return [f"{size}"] if squeeze else []
+
+def _od_footer(size, squeeze, name):
+    """od always ends with the total length"""
+    return [f"{size:06x}"]
+
+def _canonical_footer(size, squeeze, name):
+    """hexdump -C ends with the total length unless there was no data"""
+    return [f"{size:08x}"] if size else []
+
+def _c_header(name):
+    """Opening of a C array, as xxd -i writes it"""
+    return [f"unsigned char {name}[] = {{"]
+
+def _c_footer(size, squeeze, name):
+    """Close a C array and declare its length"""
+    return ["};", f"unsigned int {name}_len = {size};"]
+
+def _python_header(name):
+    """Opening of a Python bytes literal"""
+    return [f"{name} = bytes(["]
+
+def _python_footer(size, squeeze, name):
+    """Close a Python bytes literal"""
+    return ["])"]
+
+# Everything a dump format needs: line renderer, bytes per rendered unit (None
+# for the line width), header and footer lines, whether repeated lines can be
+# squeezed, the parser reading it back and the export file extension
+OutputFormat = collections.namedtuple('OutputFormat', 'render unit header footer squeeze parse extension')
+OUTPUT_FORMATS = {
+    'hexpad': OutputFormat(render_hexdump_lines, None, _no_lines, _hexpad_footer, True,
+                           functools.partial(iter_parse_hexdump, layout=HEXPAD_LAYOUT), '.txt'),
+    'xxd': OutputFormat(render_xxd_lines, None, _no_lines, _no_lines, False,
+                        functools.partial(iter_parse_hexdump, layout=XXD_LAYOUT), '.txt'),
+    'od': OutputFormat(render_od_lines, None, _no_lines, _od_footer, True,
+                       functools.partial(iter_parse_hexdump, layout=OD_LAYOUT), '.txt'),
+    'canonical': OutputFormat(render_canonical_lines, None, _no_lines, _canonical_footer, True,
+                              functools.partial(iter_parse_hexdump, layout=CANONICAL_LAYOUT), '.txt'),
+    'c': OutputFormat(render_c_lines, None, _c_header, _c_footer, False, iter_parse_c_array, '.h'),
+    'python': OutputFormat(functools.partial(render_c_lines, indent='    '), None, _python_header, _python_footer,
+                           False, iter_parse_c_array, '.py'),
+    'base64': OutputFormat(render_base64_lines, BASE64_LINE_BYTES, _no_lines, _no_lines, False,
+                           iter_parse_base64, '.b64'),
+}
+
+# Formats whose namesake tools squeeze unless given -v, so the command line does too
+SQUEEZE_BY_DEFAULT = ('od', 'canonical')
+
+def get_output_format(name):
+    """Look up a dump format by name"""
+    try:
+        return OUTPUT_FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown output format {name!r}, expected one of {', '.join(OUTPUT_FORMATS)}") from None
+
+def array_name(file_name):
+    """Variable name for a C or Python array of a file, like xxd -i picks it"""
+    name = re.sub(r'\W', '_', os.path.basename(file_name or '')) or 'data'
+    return f"_{name}" if name[0].isdigit() else name
+
+def metrics_html(items):
+    """Build the row of metric boxes for (value, label) pairs"""
+    boxes = "".join(
+        f'<div class="metric-box"><strong>{html.escape(str(value))}</strong><br>{label}</div>'
+        for value, label in items
+    )
+    return f'<div class="metrics-container">{boxes}</div>'
+
+def timing_metrics(timer):
+    """Metric box items for every stage the timer saw"""
+    return [(f"{seconds * 1000:.1f} ms", name.capitalize()) for name, seconds in timer.stages.items()]
+
+def render_timing_details(timer, name):
+    """Show a captured profile and offer the timings as a JSON download"""
+    import streamlit as st
     
-    # Format hex bytes with spaces and extra space every 4 bytes
-    hex_parts = []
-    for i in range(0, len(hex_bytes), 2):
-        if i + 1 < len(hex_bytes):
-            hex_parts.append(hex_bytes[i:i+2])
-        else:
-            hex_parts.append(hex_bytes[i] + " ")
+    if timer.profile_text:
+        with st.expander(f"🧪 cProfile (top {PROFILE_TOP_FUNCTIONS} by cumulative time)"):
+            st.code(timer.profile_text, language=None)
+    st.download_button(
+        "📊 Export Timings (JSON)",
+        timer.to_json(),
+        file_name=f"hexpad_timings_{name}.json",
+        mime="application/json",
+        key=f"timings_{name}"
+    )
 
-    # Pad with empty spaces for missing bytes to maintain alignment
-    for i in range(actual_bytes, bytes_per_line):
-        hex_parts.append("  ")  # Two spaces for missing byte
+def describe_decode_errors(errors, limit=10):
+    """Summarise invalid byte ranges for display"""
+    shown = ", ".join(f"{start}" if end - start == 1 else f"{start}-{end - 1}" for start, end in errors[:limit])
+    more = f" and {len(errors) - limit} more" if len(errors) > limit else ""
+    return f"{len(errors)} invalid byte sequence(s) replaced with \ufffd at byte offsets {shown}{more}"
 
-    # Add extra spacing every 4 bytes (every 4 hex pairs)
-    formatted_hex = []
-    for i, hex_pair in enumerate(hex_parts):
-        formatted_hex.append(hex_pair)
-        if (i + 1) % 4 == 0 and i + 1 < len(hex_parts):
-            formatted_hex.append(" ")  # Extra space every 4 bytes
+def encoding_label(codec):
+    """Sidebar label of a codec name"""
+    return next((label for label in ENCODING_OPTIONS if resolve_encoding(label) == codec), codec)
+
+def hex_input_sample(hex_input, input_format=None):
+    """Bytes from the start of Hex to Text input for encoding detection, empty if they don't parse"""
+    if input_format:
+        try:
+            return bytes(next(iter_parse_format(hex_input, input_format), b''))[:DETECT_SAMPLE_WINDOWS * DETECT_SAMPLE_BYTES]
+        except ValueError:
+            return b''
+    digits = sanitize_hex(hex_input[:3 * DETECT_SAMPLE_WINDOWS * DETECT_SAMPLE_BYTES])
+    return bytes.fromhex(digits[:len(digits) & ~1].decode('ascii'))
+
+def render_encoding_guess(guess):
+    """Show the encoding auto-detection picked and how sure it is, returning its sidebar label"""
+    import streamlit as st
     
-    # Join with spaces and calculate proper padding width
-    hex_section = " ".join(formatted_hex)
+    label = encoding_label(guess.encoding)
+    message = f"🔎 Detected {label} · {guess.confidence:.0%} confidence"
+    if guess.confidence < DETECT_MIN_CONFIDENCE:
+        st.warning(f"{message}. The data may be binary or mixed, pick the encoding in the sidebar if the text looks wrong")
+    else:
+        st.info(message)
+    return label
+
+def _new_result_cache():
+    """Build the process-wide result cache"""
+    return ResultCache()
+
+def shared_result_cache():
+    """Result cache shared by every session served by this process"""
+    import streamlit as st
+    return st.cache_resource(_new_result_cache)()
+
+def _new_job_manager():
+    """Build the process-wide background job pool"""
+    return JobManager()
+
+def shared_job_manager():
+    """Background job pool shared by every session served by this process"""
+    import streamlit as st
+    return st.cache_resource(_new_job_manager)()
+
+def session_job_key(*key):
+    """Key a job to the current browser session"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
     
-    # Format ASCII section - ALWAYS pad to bytes_per_line width so it never shifts
-    ascii_section = "|" + ascii_chars.ljust(bytes_per_line) + "|"
+    ctx = get_script_run_ctx()
+    return (ctx.session_id if ctx else None,) + key
+
+def _export_job_task(build, compress, job):
+    """Job task writing an export file, reporting progress to the job"""
+    return build(compress=compress, progress=job.update)
+
+def _read_export(path):
+    """Open an export file for its download, only once the download is clicked"""
+    return open(path, 'rb')
+
+def _render_job_progress(key, name, label):
+    """Poll a running job's progress, rerunning the whole app once it has finished"""
+    import streamlit as st
     
-    return f"{offset_str:<6}  {hex_section}  {ascii_section}"
+    job = shared_job_manager().get(key)
+    if job is None or job.finished:
+        st.rerun()
+    st.progress(
+        job.fraction,
+        text=f"{label} · {job.status} · {job.done / (1 << 20):.1f} of {job.total / (1 << 20):.1f} MB · {time.time() - job.started:.0f} s"
+    )
+    st.button("✖ Cancel", key=f"cancel_{name}", on_click=job.cancel)
 
-def char_to_printable(byte_val):
-    """Convert byte to printable ASCII character"""
-    if 32 <= byte_val <= 126:  # Printable ASCII range
-        return chr(byte_val)
+def _session_job(name, *key):
+    """The job manager and the session's key for the job slot name, discarding the slot's job for an older key"""
+    import streamlit as st
+    
+    jobs = shared_job_manager()
+    key = session_job_key(name, *key)
+    # A job for what was shown before (another file, width or encoding) isn't wanted anymore
+    previous = st.session_state.get(f"job_{name}")
+    if previous is not None and previous != key:
+        jobs.discard(previous)
+    st.session_state[f"job_{name}"] = key
+    return jobs, key
+
+def run_job(name, key, task, total, label, timer=None):
+    """Run task(job) in a background job of the session, returning the job once it is done or failed
+
+    Jobs still running after JOB_WAIT_SECONDS show a progress bar with a
+    cancel button and return None; the bar reruns the app when they finish. A
+    cancelled job offers to start again. The first rerun to collect a done job
+    counts its stage times into timer.
+    """
+    import streamlit as st
+    
+    jobs, key = _session_job(name, key)
+    job = jobs.get(key) or jobs.submit(key, task, total)
+    job.wait(JOB_WAIT_SECONDS)
+    if job.status == 'cancelled':
+        st.info(f"{label} cancelled")
+        st.button(f"↻ Restart {label.lower()}", key=f"restart_{name}", on_click=jobs.submit, args=(key, task, total))
+        return None
+    if not job.finished:
+        st.fragment(run_every=JOB_POLL_SECONDS)(_render_job_progress)(key, name, label)
+        return None
+    
+    if timer is not None and not job.reported:
+        timer.add(job.timer.stages)
+        job.reported = True
+    return job
+
+def _cached_job_task(cache, key, stage, compute, job):
+    """Job task computing a result through the result cache, with progress reported to the job"""
+    with job.timer.stage(stage):
+        return cache.get_or_compute(key, functools.partial(compute, progress=job.update))
+
+def _text_job_task(cache, hex_input, input_format, encoding, job):
+    """Job task converting hex input, returning the converted text's bytes and the ranges that failed to decode"""
+    with job.timer.stage("hash"):
+        decode_key = ("text", input_format, content_hash(hex_input.encode('utf-8')), encoding)
+    return cache.get_or_compute(
+        decode_key, functools.partial(convert_hex_input, hex_input, encoding, input_format, timer=job.timer, progress=job.update)
+    )
+
+def render_job_download(name, export_key, build, total, label, file_name, mime):
+    """Write a download to an export file in a background job, with a progress bar and cancel button while it runs
+
+    build is called with compress and a progress callback taking the input bytes done so far.
+    """
+    import streamlit as st
+    
+    compress = st.session_state.get("gzip_exports", False)
+    jobs, key = _session_job(name, export_key, compress)
+    job = jobs.get(key)
+    if job is None or job.status in ('failed', 'cancelled'):
+        if job is not None and job.status == 'failed':
+            st.error(f"Error: {job.error}")
+        elif job is not None:
+            st.info(f"{label} cancelled")
+        st.button(
+            f"⚙️ Prepare {label}",
+            key=f"prepare_{name}",
+            on_click=jobs.submit,
+            args=(key, functools.partial(_export_job_task, build, compress), total, remove_export),
+            use_container_width=True,
+            help="Runs in the background, you can keep using the page meanwhile"
+        )
+    elif not job.finished:
+        st.fragment(run_every=JOB_POLL_SECONDS)(_render_job_progress)(key, name, label)
     else:
-        return "."
+        if compress:
+            file_name, mime = f"{file_name}.gz", "application/gzip"
+        size = os.path.getsize(job.result)
+        size_text = f"{size / (1 << 20):.1f} MB" if size >= 1 << 20 else f"{-(-size // 1024)} KB"
+        st.download_button(
+            f"📥 Download {label} · {size_text}",
+            functools.partial(_read_export, job.result),
+            file_name=file_name,
+            mime=mime,
+            key=f"download_{name}"
+        )
 
-def ebcdic_char_to_printable(byte_val):
-    """Convert EBCDIC byte to its actual character representation"""
-    # EBCDIC to ASCII mapping for cp037
-    ebcdic_to_ascii = {
-        0xF0: '0', 0xF1: '1', 0xF2: '2', 0xF3: '3', 0xF4: '4', 
-        0xF5: '5', 0xF6: '6', 0xF7: '7', 0xF8: '8', 0xF9: '9',
-        0xC1: 'A', 0xC2: 'B', 0xC3: 'C', 0xC4: 'D', 0xC5: 'E', 
-        0xC6: 'F', 0xC7: 'G', 0xC8: 'H', 0xC9: 'I', 0xD1: 'J',
-        0xD2: 'K', 0xD3: 'L', 0xD4: 'M', 0xD5: 'N', 0xD6: 'O',
-        0xD7: 'P', 0xD8: 'Q', 0xD9: 'R', 0xE2: 'S', 0xE3: 'T',
-        0xE4: 'U', 0xE5: 'V', 0xE6: 'W', 0xE7: 'X', 0xE8: 'Y',
-        0xE9: 'Z', 0x81: 'a', 0x82: 'b', 0x83: 'c', 0x84: 'd',
-        0x85: 'e', 0x86: 'f', 0x87: 'g', 0x88: 'h', 0x89: 'i',
-        0x91: 'j', 0x92: 'k', 0x93: 'l', 0x94: 'm', 0x95: 'n',
-        0x96: 'o', 0x97: 'p', 0x98: 'q', 0x99: 'r', 0xA2: 's',
-        0xA3: 't', 0xA4: 'u', 0xA5: 'v', 0xA6: 'w', 0xA7: 'x',
-        0xA8: 'y', 0xA9: 'z', 0x40: ' ', 0x4B: '.', 0x4C: '<',
-        0x4D: '(', 0x4E: '+', 0x4F: '|', 0x50: '&', 0x5A: '!',
-        0x5B: '$', 0x5C: '*', 0x5D: ')', 0x5E: ';', 0x60: '-',
-        0x61: '/', 0x6B: ',', 0x6C: '%', 0x6D: '_', 0x6E: '>',
-        0x6F: '?', 0x79: '`', 0x7A: ':', 0x7B: '#', 0x7C: '@',
-        0x7D: "'", 0x7E: '=', 0x7F: '"', 0xA1: '~', 0x90: '^',
-        0xBD: '[', 0xBF: ']', 0xC0: '{', 0xD0: '}', 0xE0: '\\',
-        0x6A: '|'
-    }
-    return ebcdic_to_ascii.get(byte_val, '.')
+def render_cache_stats(slot):
+    """Show the shared cache's hit and miss counters in a sidebar placeholder"""
+    import streamlit as st
+    
+    stats = shared_result_cache().stats()
+    with slot.container():
+        st.markdown("### 🗄️ Result Cache")
+        hits, misses = st.columns(2)
+        hits.metric("Hits", stats["hits"])
+        misses.metric("Misses", stats["misses"])
+        st.caption(f'{stats["entries"]} entries · {stats["bytes"] / (1 << 20):.1f} MB cached')
 
-def text_to_hexdump(text, encoding='utf-8', bytes_per_line=16):
-    """Convert text to hexdump format"""
-    # Map encoding names
-    encoding_map = {
-        'cp037 (ebcdic)': 'cp037',
-        'utf-8': 'utf-8',
-        'ascii': 'ascii',
-        'cp1252 (windows)': 'cp1252',
-        'iso-8859-1 (latin-1)': 'iso-8859-1'
-    }
+def spooled_upload_path(uploaded_file, slot="spooled_upload"):
+    """Spool an uploaded file to disk once per upload and return the temp file path"""
+    import streamlit as st
+    
+    spooled = st.session_state.get(slot)
+    if spooled and spooled[0] == uploaded_file.file_id and os.path.exists(spooled[1]):
+        return spooled[1]
+    
+    # A new upload replaces the previous spool file
+    if spooled and os.path.exists(spooled[1]):
+        os.remove(spooled[1])
+    
+    uploaded_file.seek(0)
+    path = spool_to_tempfile(uploaded_file)
+    st.session_state[slot] = (uploaded_file.file_id, path)
+    return path
+
+@contextlib.contextmanager
+def open_active_dump():
+    """Yield the bytes behind the session's generated hexdump, or None if there is none"""
+    import streamlit as st
+    
+    dump = st.session_state.get("active_dump")
+    if dump is None:
+        yield None
+    elif isinstance(dump["source"], str):
+        if not os.path.exists(dump["source"]):
+            yield None
+            return
+        with map_file(dump["source"]) as data:
+            yield data
+    else:
+        yield dump["source"]
+
+def _viewer_step(key, pages, delta):
+    """Move the viewer by delta pages, clamped to the first and last page"""
+    import streamlit as st
+    
+    page_key = f"{key}_page"
+    st.session_state[page_key] = min(max(st.session_state[page_key] + delta, 1), pages)
+    st.session_state.pop(f"{key}_target", None)
+
+def _viewer_goto(key, bytes_per_line):
+    """Jump the viewer to the page holding the offset typed into the go-to box"""
+    import streamlit as st
     
     try:
-        enc = encoding_map.get(encoding.lower(), encoding.lower())
-        byte_data = text.encode(enc)
-    except UnicodeEncodeError:
-        enc = encoding_map.get(encoding.lower(), encoding.lower())
-        byte_data = text.encode(enc, errors='replace')
+        offset = parse_offset(st.session_state[f"{key}_goto"])
+    except ValueError:
+        st.session_state[f"{key}_error"] = "Offset must be a decimal or 0x-prefixed hex number"
+        return
     
-    lines = []
-    offset = 0
+    line = offset // bytes_per_line
+    st.session_state[f"{key}_page"] = line // st.session_state[f"{key}_page_size"] + 1
+    st.session_state[f"{key}_target"] = line
+
+def render_hexdump_viewer(data, encoding, bytes_per_line, key="viewer", timer=None, squeeze=False, hexdump=None):
+    """Render one page of a hexdump with paging and go-to-offset controls, from an IncrementalHexdump's lines if given"""
+    import streamlit as st
     
-    for i in range(0, len(byte_data), bytes_per_line):
-        chunk = byte_data[i:i + bytes_per_line]
-        
-        # Convert to hex string
-        hex_bytes = ''.join(f'{b:02x}' for b in chunk)
-        
-        # Convert to ASCII representation - use EBCDIC mapping if EBCDIC encoding
-        if encoding.lower().startswith('cp037') or 'ebcdic' in encoding.lower():
-            ascii_chars = ''.join(ebcdic_char_to_printable(b) for b in chunk)
+    timer = timer or StageTimer()
+    total_lines = line_count(len(data), bytes_per_line)
+    page_key = f"{key}_page"
+    
+    col_size, col_page, col_goto = st.columns([1, 1, 2])
+    with col_size:
+        page_size = st.selectbox("Lines per page", VIEWER_PAGE_SIZES, index=1, key=f"{key}_page_size")
+    
+    # Keep the page in range when the data or the line width changes
+    pages = max(1, -(-total_lines // page_size))
+    st.session_state[page_key] = min(max(st.session_state.get(page_key, 1), 1), pages)
+    
+    with col_page:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+    with col_goto:
+        st.text_input(
+            "Go to offset",
+            key=f"{key}_goto",
+            placeholder="e.g. 4096 or 0x1000",
+            on_change=_viewer_goto,
+            args=(key, bytes_per_line),
+            help="Jump to the line holding this byte offset"
+        )
+    
+    error = st.session_state.pop(f"{key}_error", None)
+    if error:
+        st.error(error)
+    
+    target = st.session_state.get(f"{key}_target")
+    if target is not None and target >= total_lines:
+        st.warning(f"Offset is past the end of the data ({len(data)} bytes)")
+        target = None
+    
+    nav = st.columns(4)
+    for col, (label, delta) in zip(nav, [("⏮ First", -pages), ("◀ Prev", -1), ("Next ▶", 1), ("Last ⏭", pages)]):
+        with col:
+            st.button(label, key=f"{key}_{label}", on_click=_viewer_step, args=(key, pages, delta), use_container_width=True)
+    
+    # Only the visible window is rendered and sent to the browser
+    first_line = (page - 1) * page_size
+    with timer.stage("format"):
+        if hexdump is not None:
+            lines = hexdump.lines(first_line, page_size)
         else:
-            ascii_chars = ''.join(char_to_printable(b) for b in chunk)
-        
-        # Format the line
-        line = format_hex_line(offset, hex_bytes, ascii_chars, bytes_per_line)
-        lines.append(line)
-        
-        offset += len(chunk)
+            lines = hexdump_window(data, first_line, page_size, encoding, bytes_per_line, squeeze)
+    
+    with timer.stage("render"):
+        lines = [html.escape(line) for line in lines]
+        # Squeezed pages have fewer lines, so find the target by its offset
+        if target is not None:
+            target_offset = str(target * bytes_per_line)
+            for i, line in enumerate(lines):
+                if line.split(' ', 1)[0] == target_offset:
+                    lines[i] = f'<span class="hexdump-highlight">{line}</span>'
+                    break
+        st.markdown(f'<div class="hexdump-output">{chr(10).join(lines)}</div>', unsafe_allow_html=True)
     
-    return '\n'.join(lines)
+    last_line = min(first_line + page_size, total_lines)
+    st.caption(
+        f"Page {page} of {pages} · lines {first_line + 1}-{last_line} of {total_lines} · "
+        f"offsets {first_line * bytes_per_line}-{min(last_line * bytes_per_line, len(data))}"
+    )
 
-def hex_to_text(hex_input, encoding='utf-8'):
-    """Convert hex string to text"""
-    # Map encoding names
-    encoding_map = {
-        'cp037 (ebcdic)': 'cp037',
-        'utf-8': 'utf-8',
-        'ascii': 'ascii',
-        'cp1252 (windows)': 'cp1252',
-        'iso-8859-1 (latin-1)': 'iso-8859-1'
-    }
+def _hash_job_task(source, job):
+    """Job task hashing a dump source"""
+    with job.timer.stage("hash"):
+        return content_hash(source, progress=job.update)
+
+def _index_job_task(source, record_format, lrecl, job):
+    """Job task indexing the records of a dump source"""
+    with job.timer.stage("index"), open_buffer(source) as data:
+        return RecordIndex.build(data, record_format, lrecl, progress=job.update)
+
+def prepare_active_dump(dump, size, timer):
+    """Hash the active dump and index its records once, each in a background job
+
+    Returns False, with the running job's progress shown, until both are done.
+    """
+    import streamlit as st
+    
+    if dump["hash"] is None:
+        job = run_job("hash", dump["token"], functools.partial(_hash_job_task, dump["source"]), size, "Hashing", timer)
+        if job is None:
+            return False
+        if job.status == 'failed':
+            st.error(f"Error: {job.error}")
+            return False
+        dump["hash"] = job.result
+    
+    if dump["record_format"] and "index" not in dump:
+        job = run_job(
+            "index", (dump["hash"], dump["record_format"], dump["lrecl"]),
+            functools.partial(_index_job_task, dump["source"], dump["record_format"], dump["lrecl"]),
+            size, "Indexing records", timer
+        )
+        if job is None:
+            return False
+        dump["index"] = job.result
+        dump["index_error"] = job.error
+    return True
+
+def active_record_index(dump):
+    """The record index of the active dump; None (with the error shown) if its records don't parse"""
+    import streamlit as st
+    
+    if dump["index_error"]:
+        st.error(f"Error: {dump['index_error']}. Showing the flat hexdump instead.")
+    return dump["index"]
+
+def _record_goto(key, total):
+    """Jump the record viewer to the page holding the record number typed into the go-to box"""
+    import streamlit as st
     
     try:
-        # Clean hex input
-        hex_clean = ''.join(hex_input.split())
-        hex_clean = ''.join(c for c in hex_clean if c in '0123456789abcdefABCDEF')
-        
-        if len(hex_clean) % 2 != 0:
-            return "Error: Hex string must have even number of characters"
-        
-        # Convert to bytes
-        byte_data = bytes.fromhex(hex_clean)
-        
-        # Convert to text
-        enc = encoding_map.get(encoding.lower(), encoding.lower())
-        return byte_data.decode(enc)
-            
-    except Exception as e:
-        return f"Error: {str(e)}"
+        number = int(st.session_state[f"{key}_goto"].strip().replace('_', ''))
+    except ValueError:
+        st.session_state[f"{key}_error"] = "Record number must be a whole number"
+        return
+    if not 1 <= number <= total:
+        st.session_state[f"{key}_error"] = f"Record number must be between 1 and {total}"
+        return
+    
+    st.session_state[f"{key}_page"] = (number - 1) // st.session_state[f"{key}_page_size"] + 1
+    st.session_state[f"{key}_target"] = number - 1
 
-def parse_hexdump(hexdump_text):
-    """Parse hexdump output back to original text"""
-    lines = hexdump_text.strip().split('\n')
-    hex_data = ""
+def render_record_viewer(data, index, encoding, bytes_per_line, key="records", timer=None):
+    """Render one page of records, each dumped separately, with paging and go-to-record controls"""
+    import streamlit as st
     
-    for line in lines:
-        if not line.strip():
-            continue
-            
-        # Extract hex part (skip offset, take hex section before ASCII)
-        parts = line.split('|')
-        if len(parts) >= 2:
-            hex_part = parts[0].split('  ', 1)
-            if len(hex_part) >= 2:
-                hex_section = hex_part[1].strip()
-                # Remove spaces from hex section
-                hex_data += hex_section.replace(' ', '')
+    timer = timer or StageTimer()
+    total = len(index)
+    page_key = f"{key}_page"
+    
+    col_size, col_page, col_goto = st.columns([1, 1, 2])
+    with col_size:
+        page_size = st.selectbox("Records per page", RECORD_PAGE_SIZES, key=f"{key}_page_size")
+    
+    # Keep the page in range when the dataset or the record format changes
+    pages = max(1, -(-total // page_size))
+    st.session_state[page_key] = min(max(st.session_state.get(page_key, 1), 1), pages)
+    
+    with col_page:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+    with col_goto:
+        st.text_input(
+            "Go to record",
+            key=f"{key}_goto",
+            placeholder=f"1-{total}",
+            on_change=_record_goto,
+            args=(key, total),
+            help="Records are found through the index, the dataset isn't rescanned"
+        )
+    
+    error = st.session_state.pop(f"{key}_error", None)
+    if error:
+        st.error(error)
+    target = st.session_state.get(f"{key}_target")
+    
+    nav = st.columns(4)
+    for col, (label, delta) in zip(nav, [("⏮ First", -pages), ("◀ Prev", -1), ("Next ▶", 1), ("Last ⏭", pages)]):
+        with col:
+            st.button(label, key=f"{key}_{label}", on_click=_viewer_step, args=(key, pages, delta), use_container_width=True)
+    
+    # Only the records on this page are looked up and rendered
+    first = (page - 1) * page_size
+    numbers = range(first, min(first + page_size, total))
+    table = display_table_for(encoding)
+    with timer.stage("format"):
+        records = [render_record_lines(n, *index.record(data, n), bytes_per_line, table) for n in numbers]
+    
+    with timer.stage("render"):
+        lines = []
+        for n, record_lines in zip(numbers, records):
+            header_class = "hexdump-record-header hexdump-highlight" if n == target else "hexdump-record-header"
+            lines.append(f'<span class="{header_class}">{html.escape(record_lines[0])}</span>')
+            lines += [html.escape(line) for line in record_lines[1:]]
+        st.markdown(f'<div class="hexdump-output">{chr(10).join(lines)}</div>', unsafe_allow_html=True)
+    
+    st.caption(f"Page {page} of {pages} · records {first + 1}-{first + len(records)} of {total}")
+    return numbers
+
+def render_copybook_fields(data, dump, numbers, timer):
+    """Show the copybook fields of the visible records decoded, with a CSV export of every record"""
+    import streamlit as st
+    
+    fields = dump["fields"]
+    encoding = dump["encoding"].lower()
+    with timer.stage("fields"):
+        columns = decode_copybook_records(data, fields, dump["lrecl"], encoding, numbers.start, len(numbers))
+        # A short last record can't hold the layout and isn't decoded
+        table = {"Record": [n + 1 for n in numbers[:len(columns[0][0])]]}
+        invalid = 0
+        for field, (values, bad) in zip(fields, columns):
+            if field.name != 'FILLER':
+                table[field.name] = format_copybook_column(field, values, bad)
+            if bad is not None:
+                invalid += int(bad.sum())
+    
+    st.markdown("#### 🧾 Decoded Fields")
+    st.dataframe(table, hide_index=True)
+    if invalid:
+        st.warning(f"{invalid} numeric value(s) on this page don't hold valid packed, zoned or binary data and are left empty")
+    
+    csv_key = ("copybook", dump["hash"], dump["lrecl"], encoding, tuple(fields))
+    render_job_download(
+        "copybook", csv_key,
+        functools.partial(export_copybook_csv, dump["source"], fields, dump["lrecl"], encoding),
+        len(data), "Decoded Fields (CSV)", f"fields_{dump['name']}.csv", "text/csv"
+    )
+
+def _viewer_jump(offset, index, bytes_per_line):
+    """Move the viewer to the line, or record, holding a byte offset"""
+    import streamlit as st
+    
+    if index is not None:
+        record = index.find(offset)
+        if record is None:
+            return
+        st.session_state["records_page"] = record // st.session_state["records_page_size"] + 1
+        st.session_state["records_target"] = record
+    else:
+        line = offset // bytes_per_line
+        st.session_state["viewer_page"] = line // st.session_state["viewer_page_size"] + 1
+        st.session_state["viewer_target"] = line
+
+def _search_jump(matches, index, bytes_per_line, delta=0):
+    """Move the viewer to the line, or record, holding the selected search match"""
+    import streamlit as st
+    
+    number = min(max(st.session_state.get("search_match", 0) + delta, 0), len(matches) - 1)
+    st.session_state["search_match"] = number
+    _viewer_jump(matches[number][0], index, bytes_per_line)
+
+def _search_submit():
+    """Check the entered pattern and ask for a search of the active dump, which runs as a background job"""
+    import streamlit as st
+    
+    dump = st.session_state["active_dump"]
+    pattern = st.session_state["search_pattern"]
+    mode = SEARCH_MODE_OPTIONS[st.session_state["search_mode"]]
+    encoding = dump["encoding"].lower()
+    if not pattern:
+        return
+    
+    try:
+        compile_search(pattern, mode, encoding)
+    except (ValueError, LookupError) as e:
+        st.session_state["search_error"] = f"Error: {e}"
+        return
+    st.session_state["search_request"] = ("search", dump["hash"], mode, pattern, encoding)
+    st.session_state.pop("search_results", None)
+
+def collect_search(data, dump, timer):
+    """Run the requested search of the active dump in a background job, keeping its matches once done
+
+    The viewer above is already drawn by then, so a rerun moves it to the first match.
+    """
+    import streamlit as st
+    
+    request = st.session_state.get("search_request")
+    if request is None or request[1] != dump["hash"]:
+        return
+    _, _, mode, pattern, encoding = request
+    job = run_job(
+        "search", request,
+        functools.partial(_cached_job_task, shared_result_cache(), request, "search",
+                          functools.partial(search_matches, dump["source"], pattern, mode, encoding)),
+        len(data), "Searching", timer
+    )
+    if job is None:
+        return
+    
+    del st.session_state["search_request"]
+    if job.status == 'failed':
+        st.session_state["search_error"] = f"Error: {job.error}"
+        return
+    st.session_state["search_results"] = {"hash": dump["hash"], "matches": job.result}
+    st.session_state["search_match"] = 0
+    if job.result:
+        st.session_state["viewer_jump"] = job.result[0][0]
+        st.rerun()
+
+def render_search(data, dump, index, bytes_per_line, timer):
+    """Offer a search of the active dump and list the matches, picking one jumps the viewer to it"""
+    import streamlit as st
+    
+    st.markdown("#### 🔎 Search")
+    col_mode, col_pattern = st.columns([1, 2])
+    with col_mode:
+        st.selectbox("Search For", list(SEARCH_MODE_OPTIONS), key="search_mode")
+    with col_pattern:
+        st.text_input(
+            "Pattern",
+            key="search_pattern",
+            placeholder="CUSTOMER, c3 e4 e2 e3 or \\x40{8,}",
+            help="Text is encoded with the selected encoding before searching, so ASCII input finds EBCDIC data"
+        )
+    
+    st.button("🔎 Search", key="search_button", on_click=_search_submit, use_container_width=True)
+    collect_search(data, dump, timer)
+    error = st.session_state.pop("search_error", None)
+    if error:
+        st.error(error)
+    
+    results = st.session_state.get("search_results")
+    if not results or results["hash"] != dump["hash"]:
+        return
+    
+    matches = results["matches"]
+    if not matches:
+        st.info("No matches")
+        return
+    
+    more = " (only the first ones are listed)" if len(matches) == SEARCH_MAX_MATCHES else ""
+    st.caption(f"{len(matches)} match(es){more}")
+    col_prev, col_match, col_next = st.columns([1, 4, 1])
+    with col_prev:
+        st.button("◀ Prev", key="search_prev", on_click=_search_jump, args=(matches, index, bytes_per_line, -1), use_container_width=True)
+    with col_match:
+        st.selectbox(
+            "Jump to match",
+            range(len(matches)),
+            format_func=lambda i: f"#{i + 1} · offset {matches[i][0]} (0x{matches[i][0]:x}) · {matches[i][1]} bytes",
+            key="search_match",
+            on_change=_search_jump,
+            args=(matches, index, bytes_per_line),
+            label_visibility="collapsed"
+        )
+    with col_next:
+        st.button("Next ▶", key="search_next", on_click=_search_jump, args=(matches, index, bytes_per_line, 1), use_container_width=True)
+
+def _stats_jump(index, bytes_per_line):
+    """Move the viewer to the start of the entropy map block clicked"""
+    import streamlit as st
+    
+    points = st.session_state["stats_map"].selection.get("block_pick") or []
+    if points:
+        _viewer_jump(int(points[0]["offset"]), index, bytes_per_line)
+
+def render_byte_stats(data, dump, index, bytes_per_line, timer):
+    """Show the byte histogram, printable ratio and entropy map of the active dump, clicking a block jumps the viewer to it"""
+    import streamlit as st
+    import altair as alt
+    
+    st.markdown("#### 📊 Byte Statistics")
+    show = st.checkbox(
+        "Analyse bytes",
+        key="byte_stats",
+        help="Byte value histogram, printable ratio and a per-block entropy map of the whole input"
+    )
+    if not show:
+        return
+    
+    scan = st.selectbox("Scan", list(STATS_SCAN_OPTIONS), key="stats_scan")
+    sample = STATS_SCAN_OPTIONS[scan]
+    stats_key = ("stats", dump["hash"], sample)
+    job = run_job(
+        "stats", stats_key,
+        functools.partial(_cached_job_task, shared_result_cache(), stats_key, "stats",
+                          functools.partial(byte_stats, dump["source"], sample=sample)),
+        len(data), "Analysing bytes", timer
+    )
+    if job is None:
+        return
+    if job.status == 'failed':
+        st.error(f"Error: {job.error}")
+        return
+    stats = job.result
+    if not stats.scanned:
+        st.info("No bytes to analyse")
+        return
+    
+    histogram = stats.histogram
+    printable = histogram[printable_mask(dump["encoding"].lower())].sum() / stats.scanned
+    st.markdown(metrics_html([
+        (f"{shannon_entropy(histogram):.2f}", "Entropy (bits/byte)"),
+        (f"{printable:.1%}", f"Printable ({dump['encoding']})"),
+        (f"{histogram[0] / stats.scanned:.1%}", "Zero Bytes"),
+        (int((histogram > 0).sum()), "Distinct Values"),
+    ]), unsafe_allow_html=True)
+    
+    values = [{"byte": i, "hex": f"{i:02x}", "count": int(count)} for i, count in enumerate(histogram)]
+    st.altair_chart(
+        alt.Chart(alt.Data(values=values), height=160).mark_bar().encode(
+            x=alt.X("byte:Q", title="Byte value", scale=alt.Scale(domain=[0, 256])),
+            y=alt.Y("count:Q", title="Count"),
+            tooltip=["hex:N", "count:Q"]
+        )
+    )
+    
+    # One rectangle per block, coloured by entropy: dark padding, bright compressed or encrypted data
+    blocks = [
+        {"offset": start, "end": min(start + stats.block_size, stats.size), "hex": f"0x{start:x}", "entropy": round(float(e), 3)}
+        for start, e in zip(range(0, stats.size, stats.block_size), stats.entropy)
+    ]
+    pick = alt.selection_point(name="block_pick", fields=["offset"], on="click")
+    st.altair_chart(
+        alt.Chart(alt.Data(values=blocks), height=60).mark_rect().encode(
+            x=alt.X("offset:Q", title="Offset", scale=alt.Scale(domain=[0, stats.size])),
+            x2="end:Q",
+            color=alt.Color("entropy:Q", title="Bits/byte", scale=alt.Scale(domain=[0, 8], scheme="viridis")),
+            tooltip=["hex:N", "offset:Q", "entropy:Q"]
+        ).add_params(pick),
+        key="stats_map",
+        on_select=functools.partial(_stats_jump, index, bytes_per_line),
+        selection_mode="block_pick"
+    )
+    
+    sampled = f" · sampled {stats.scanned} of {stats.size} bytes" if stats.sampled else ""
+    st.caption(f"Entropy map of {len(blocks)} block(s) of {stats.block_size} bytes{sampled} · click a block to jump to it")
+
+def _compare_job_task(path_a, path_b, bytes_per_line, job):
+    """Job task comparing two files through memory maps"""
+    with job.timer.stage("compare"), map_file(path_a) as a, map_file(path_b) as b:
+        return summarize_diff(a, b, bytes_per_line, progress=job.update)
+
+def active_diff_hunks(diff, size, bytes_per_line, timer):
+    """Compare the files once per line width in a background job, caching the hunks and totals in the session's diff
+
+    Returns None, with the job's progress or error shown, until the comparison is done.
+    """
+    import streamlit as st
+    
+    cached = diff["hunks"].get(bytes_per_line)
+    if cached is not None:
+        return cached
+    
+    job = run_job(
+        "compare", diff["paths"] + (bytes_per_line,),
+        functools.partial(_compare_job_task, *diff["paths"], bytes_per_line), size, "Comparing", timer
+    )
+    if job is None:
+        return None
+    if job.status == 'failed':
+        st.error(f"Error: {job.error}")
+        return None
+    cached = diff["hunks"][bytes_per_line] = job.result
+    return cached
+
+def diff_line_html(line, changed):
+    """Escape one dump line for the compare viewer, marking the changed bytes in the hex and ASCII columns"""
+    if not changed or not line:
+        return html.escape(line)
+    
+    hex_start = max(line.index(' '), 6) + 2
+    ascii_start = line.index('|') + 1
+    marked = set()
+    for j in changed:
+        column = hex_start + 3 * j + 2 * (j // 4)
+        marked.update((column, column + 1, ascii_start + j))
+    
+    parts = []
+    for is_marked, chars in itertools.groupby(enumerate(line), lambda item: item[0] in marked):
+        text = html.escape(''.join(ch for _, ch in chars))
+        parts.append(f'<span class="diff-byte">{text}</span>' if is_marked else text)
+    return ''.join(parts)
+
+def render_diff_viewer(a, b, hunks, encoding, bytes_per_line, key="diff", timer=None):
+    """Render one page of hunks of two files side by side, with the changed bytes marked"""
+    import streamlit as st
     
-    return hex_data
+    timer = timer or StageTimer()
+    page_key = f"{key}_page"
+    pages = max(1, -(-len(hunks) // DIFF_PAGE_HUNKS))
+    st.session_state[page_key] = min(max(st.session_state.get(page_key, 1), 1), pages)
+    
+    page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+    nav = st.columns(4)
+    for col, (label, delta) in zip(nav, [("⏮ First", -pages), ("◀ Prev", -1), ("Next ▶", 1), ("Last ⏭", pages)]):
+        with col:
+            st.button(label, key=f"{key}_{label}", on_click=_viewer_step, args=(key, pages, delta), use_container_width=True)
+    
+    # Only the hunks on this page are read from the files
+    first = (page - 1) * DIFF_PAGE_HUNKS
+    shown = hunks[first:first + DIFF_PAGE_HUNKS]
+    table = display_table_for(encoding)
+    size = max(len(a), len(b))
+    with timer.stage("format"):
+        rendered = [render_diff_rows(a, b, first_line, end_line, bytes_per_line, table) for first_line, end_line in shown]
+    
+    with timer.stage("render"):
+        lines = []
+        for (first_line, end_line), rows in zip(shown, rendered):
+            header = f"@@ offsets {first_line * bytes_per_line}-{min(end_line * bytes_per_line, size)} @@"
+            lines.append(f'<span class="hexdump-record-header">{header}</span>')
+            width = max(len(left) for left, _, _ in rows)
+            for left, right, changed in rows:
+                padding = ' ' * (width - len(left))
+                marker = '|' if changed else ' '
+                lines.append(f"{diff_line_html(left, changed)}{padding}  {marker}  {diff_line_html(right, changed)}")
+        st.markdown(f'<div class="hexdump-output">{chr(10).join(lines)}</div>', unsafe_allow_html=True)
+    
+    st.caption(f"Page {page} of {pages} · hunks {first + 1}-{first + len(shown)} of {len(hunks)}")
 
 def main():
+    import streamlit as st
+    
     st.set_page_config(page_title="Hexpad Utility", layout="wide")
     
     st.markdown("""
@@ -210,6 +3143,21 @@ def main():
         position: relative;
     }
     
+    .hexdump-highlight {
+        background: rgba(240, 147, 251, 0.35);
+        border-radius: 4px;
+    }
+    
+    .diff-byte {
+        background: rgba(245, 87, 108, 0.45);
+        border-radius: 2px;
+    }
+    
+    .hexdump-record-header {
+        color: #f093fb;
+        font-weight: bold;
+    }
+    
     .hexdump-output::before {
         content: '';
         position: absolute;
@@ -225,6 +3173,7 @@ def main():
     /* Metrics container with gradient background */
     .metrics-container {
         display: flex;
+        flex-wrap: wrap;
         justify-content: space-around;
         margin: 20px 0;
         gap: 15px;
@@ -409,8 +3358,8 @@ def main():
         
         encoding = st.selectbox(
             "Character Encoding",
-            ["CP037 (EBCDIC)", "UTF-8", "ASCII", "CP1252 (Windows)", "ISO-8859-1 (Latin-1)"],
-            help="Choose the character encoding for conversion"
+            ENCODING_OPTIONS + [AUTO_ENCODING],
+            help="Choose the character encoding for conversion; Auto-detect scores every codepage on a sample of the data first"
         )
         
         bytes_per_line = st.selectbox(
@@ -423,15 +3372,8 @@ def main():
         # Sample data button
         if st.button("📝 Load Sample", use_container_width=True):
             # Generate sample hex based on current encoding
-            encoding_map = {
-                'cp037 (ebcdic)': 'cp037',
-                'utf-8': 'utf-8',
-                'ascii': 'ascii',
-                'cp1252 (windows)': 'cp1252',
-                'iso-8859-1 (latin-1)': 'iso-8859-1'
-            }
             try:
-                enc = encoding_map.get(encoding.lower(), encoding.lower())
+                enc = resolve_encoding(encoding)
                 sample_bytes = SAMPLE_TEXT.encode(enc)
                 sample_hex = ''.join(f'{b:02x}' for b in sample_bytes)
             except:
@@ -446,8 +3388,47 @@ def main():
             # Clear session state for both tabs by setting to empty strings
             st.session_state["input_text"] = ""
             st.session_state["hex_input"] = ""
+            st.session_state.pop("active_dump", None)
+            st.session_state.pop("incremental_dump", None)
             st.rerun()
         
+        # A profile covers a single conversion, so untick the box once one was captured
+        if st.session_state.pop("profile_captured", False):
+            st.session_state["profile_next"] = False
+        squeeze = st.checkbox(
+            "✳️ Squeeze repeated lines",
+            key="squeeze",
+            help="Collapse runs of identical lines into a single '*' like hexdump -C; Hex to Text expands them again"
+        )
+        
+        incremental = st.checkbox(
+            "⚡ Incremental re-dump",
+            key="incremental",
+            help="Keep the formatted lines of typed text, so generating again after an edit only reformats the lines it touches"
+        )
+        
+        st.checkbox(
+            "🗜️ Gzip downloads",
+            key="gzip_exports",
+            help="Compress hexdump, field and diff exports, hexdumps usually shrink to half their size or less"
+        )
+        
+        export_format = st.selectbox(
+            "📄 Export Format",
+            list(DUMP_FORMAT_OPTIONS),
+            key="export_format",
+            help="Layout of the full hexdump download; the viewer always shows the hexpad layout"
+        )
+        
+        profile_next = st.checkbox(
+            "🧪 Profile next conversion",
+            key="profile_next",
+            help="Capture a cProfile of the next Generate/Convert run, shown below its timings"
+        )
+        
+        # Filled in at the end of the run so the counters include this run's lookups
+        cache_stats_slot = st.empty()
+        
         st.markdown("### 📖 Format Info")
         st.markdown("""
         **Hexdump Format:**
@@ -460,65 +3441,202 @@ def main():
         """)
     
     # Main tabs
-    tab1, tab2 = st.tabs(["📝 Text → Hexdump Conversion", "🔄 Hex → Text Conversion"])
+    tab1, tab2, tab3 = st.tabs(["📝 Text → Hexdump Conversion", "🔄 Hex → Text Conversion", "🆚 Compare Files"])
     
     with tab1:
         st.markdown('<div class="section-header">📝 Text to Hexdump Conversion</div>', unsafe_allow_html=True)
         
-        input_text = st.text_area(
-            "Input Text",
-            height=200,
-            key="input_text",
-            placeholder="Enter text to convert to hexdump format...",
-            help="Enter any text to see its hexdump representation"
+        input_mode = st.radio(
+            "Input Mode",
+            ["Text", "File Upload"],
+            horizontal=True,
+            key="input_mode",
+            help="Paste text to encode it, or upload a file to dump its raw bytes"
         )
         
+        input_text = ""
+        uploaded_file = None
+        if input_mode == "Text":
+            input_text = st.text_area(
+                "Input Text",
+                height=200,
+                key="input_text",
+                placeholder="Enter text to convert to hexdump format...",
+                help="Enter any text to see its hexdump representation"
+            )
+        else:
+            uploaded_file = st.file_uploader(
+                "Input File",
+                key="input_file",
+                help="The file's raw bytes are dumped as-is; the encoding only affects the ASCII column"
+            )
+        
+        # Record mode dumps each record of a mainframe dataset separately
+        col_format, col_lrecl = st.columns([2, 1])
+        with col_format:
+            record_label = st.selectbox(
+                "Record Format",
+                list(RECORD_FORMAT_OPTIONS),
+                key="record_format",
+                help="Split the data into fixed-length, RDW/BDW variable or newline-delimited records"
+            )
+        with col_lrecl:
+            lrecl = st.number_input(
+                "LRECL",
+                min_value=1,
+                value=80,
+                step=1,
+                key="record_lrecl",
+                disabled=RECORD_FORMAT_OPTIONS[record_label] != "fixed",
+                help="Record length of fixed-length datasets"
+            )
+        if RECORD_FORMAT_OPTIONS[record_label] == "fixed":
+            copybook_text = st.text_area(
+                "Field Layout (copybook, optional)",
+                height=120,
+                key="copybook",
+                placeholder="05 CUST-ID    PIC 9(6).\n05 CUST-NAME  PIC X(20).\n05 BALANCE    PIC S9(7)V99 COMP-3.",
+                help="Decode zoned, packed (COMP-3), binary (COMP) and text fields of every record"
+            )
+        else:
+            copybook_text = ""
+        
         # Convert button
         convert_button = st.button("🔍 Generate Hexdump", type="primary", use_container_width=True)
         
-        if convert_button and input_text:
-            # Show metrics
-            try:
-                encoding_map = {
-                    'cp037 (ebcdic)': 'cp037',
-                    'utf-8': 'utf-8',
-                    'ascii': 'ascii',
-                    'cp1252 (windows)': 'cp1252',
-                    'iso-8859-1 (latin-1)': 'iso-8859-1'
+        # Per-stage timings of this run, shown next to the metrics
+        timer = StageTimer(profile=bool(convert_button and profile_next))
+        metrics_slot = None
+        with timer:
+            if convert_button and (input_text or uploaded_file):
+                # Remember what was dumped so the viewer survives reruns
+                guess = None
+                dump_encoding = encoding
+                if uploaded_file:
+                    with timer.stage("spool"):
+                        source = spooled_upload_path(uploaded_file)
+                    name = uploaded_file.name
+                    if encoding == AUTO_ENCODING:
+                        with timer.stage("detect"):
+                            guess = detect_encoding(source)
+                        dump_encoding = encoding_label(guess.encoding)
+                else:
+                    # Typed text has no bytes to detect from yet, it is encoded as UTF-8
+                    if encoding == AUTO_ENCODING:
+                        dump_encoding = "UTF-8"
+                    with timer.stage("encode"):
+                        source = encode_text(input_text, dump_encoding)
+                    name = dump_encoding.lower()
+                
+                # Flat dumps of typed text keep their lines, an edit then reformats only the lines it touches
+                reformatted = None
+                if incremental and not uploaded_file and not squeeze and not RECORD_FORMAT_OPTIONS[record_label] \
+                        and len(source) <= INCREMENTAL_MAX_BYTES:
+                    hexdump = st.session_state.get("incremental_dump")
+                    if hexdump is None or (hexdump.encoding, hexdump.bytes_per_line) != (dump_encoding.lower(), bytes_per_line):
+                        hexdump = IncrementalHexdump(dump_encoding.lower(), bytes_per_line)
+                    with timer.stage("format"):
+                        reformatted = hexdump.update(source)
+                    st.session_state["incremental_dump"] = hexdump
+                
+                # The content hash keying cached results is computed in a background job
+                st.session_state["active_dump"] = {
+                    "name": name,
+                    "source": source,
+                    "encoding": dump_encoding,
+                    "guess": guess,
+                    "reformatted": reformatted,
+                    "token": uuid.uuid4().hex,
+                    "hash": None,
+                    "record_format": RECORD_FORMAT_OPTIONS[record_label],
+                    "lrecl": lrecl,
+                    "fields": None
                 }
-                enc = encoding_map.get(encoding.lower(), encoding.lower())
-                byte_count = len(input_text.encode(enc))
-            except:
-                byte_count = len(input_text.encode('utf-8', errors='replace'))
-            
-            st.markdown(f"""
-            <div class="metrics-container">
-                <div class="metric-box">
-                    <strong>{byte_count}</strong><br>Bytes
-                </div>
-                <div class="metric-box">
-                    <strong>{encoding}</strong><br>Encoding
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+                if copybook_text.strip():
+                    try:
+                        fields = parse_copybook(copybook_text)
+                        if copybook_length(fields) > lrecl:
+                            raise ValueError(f"The copybook covers {copybook_length(fields)} bytes, more than the LRECL of {lrecl}")
+                        st.session_state["active_dump"]["fields"] = fields
+                    except ValueError as e:
+                        st.error(f"Error: {e}")
+                for key in ("viewer", "records"):
+                    st.session_state[f"{key}_page"] = 1
+                    st.session_state.pop(f"{key}_target", None)
+                st.session_state["profile_captured"] = timer.profiling
             
-            # Generate hexdump
-            hexdump_output = text_to_hexdump(input_text, encoding.lower(), bytes_per_line)
-            
-            st.markdown("#### 🔍 Hexdump Output")
-            st.markdown(f'<div class="hexdump-output">{hexdump_output}</div>', unsafe_allow_html=True)
-            
-            # Download button
-            st.download_button(
-                "📥 Download Hexdump",
-                hexdump_output,
-                file_name=f"hexdump_{encoding.lower()}.txt",
-                mime="text/plain"
-            )
+            with open_active_dump() as dump_data:
+                dump = st.session_state.get("active_dump")
+                if dump_data is not None and prepare_active_dump(dump, len(dump_data), timer):
+                    byte_count = len(dump_data)
+                    
+                    # Metrics are filled in once every stage of this run is timed
+                    metrics_slot = st.empty()
+                    if dump.get("guess"):
+                        render_encoding_guess(dump["guess"])
+                    
+                    index = None
+                    if dump["record_format"]:
+                        index = active_record_index(dump)
+                    # A search finished in the last run moves the viewer before it is drawn
+                    if "viewer_jump" in st.session_state:
+                        _viewer_jump(st.session_state.pop("viewer_jump"), index, bytes_per_line)
+                    
+                    st.markdown("#### 🔍 Hexdump Output")
+                    if index is not None:
+                        numbers = render_record_viewer(dump_data, index, dump["encoding"].lower(), bytes_per_line, timer=timer)
+                        if dump["fields"]:
+                            render_copybook_fields(dump_data, dump, numbers, timer)
+                        dump_key = ("records", dump["hash"], dump["record_format"], dump["lrecl"], dump["encoding"].lower(), bytes_per_line)
+                        build_dump = functools.partial(
+                            export_records, dump["source"], dump["record_format"], dump["encoding"].lower(), bytes_per_line, dump["lrecl"]
+                        )
+                    else:
+                        # Kept lines only apply while they match the dump and the current layout
+                        hexdump = st.session_state.get("incremental_dump")
+                        if hexdump is None or hexdump.data is not dump["source"] or hexdump.bytes_per_line != bytes_per_line or squeeze:
+                            hexdump = None
+                        render_hexdump_viewer(dump_data, dump["encoding"].lower(), bytes_per_line, timer=timer, squeeze=squeeze,
+                                              hexdump=hexdump)
+                        output_format = DUMP_FORMAT_OPTIONS[export_format]
+                        dump_key = ("hexdump", dump["hash"], dump["encoding"].lower(), bytes_per_line, squeeze, output_format)
+                        if hexdump is not None and output_format == 'hexpad':
+                            build_dump = functools.partial(export_hexdump_bodies, hexdump.bodies, bytes_per_line)
+                        else:
+                            build_dump = functools.partial(
+                                export_hexdump, dump["source"], dump["encoding"].lower(), bytes_per_line, squeeze, output_format,
+                                name=array_name(dump["name"])
+                            )
+                    
+                    # The full dump is written to a file in the background, only when asked for
+                    extension = get_output_format(output_format).extension if index is None else ".txt"
+                    render_job_download("hexdump", dump_key, build_dump, byte_count, "Hexdump",
+                                        f"hexdump_{dump['name']}{extension}", "text/plain")
+                    
+                    render_search(dump_data, dump, index, bytes_per_line, timer)
+                    render_byte_stats(dump_data, dump, index, bytes_per_line, timer)
+        
+        if metrics_slot is not None:
+            timer.meta = {"bytes": byte_count, "encoding": dump["encoding"], "bytes_per_line": bytes_per_line}
+            extra_metrics = [(len(index), "Records")] if index is not None else []
+            if dump.get("reformatted") is not None:
+                extra_metrics.append((dump["reformatted"], "Lines Reformatted"))
+            metrics_slot.markdown(metrics_html(
+                [(byte_count, "Bytes"), (dump["encoding"], "Encoding")] + extra_metrics + timing_metrics(timer)
+            ), unsafe_allow_html=True)
+            render_timing_details(timer, "hexdump")
     
     with tab2:
         st.markdown('<div class="section-header">🔄 Hex to Text Conversion</div>', unsafe_allow_html=True)
         
+        hex_format = st.radio(
+            "Input Format",
+            ["Hex Bytes"] + list(DUMP_FORMAT_OPTIONS),
+            horizontal=True,
+            key="hex_format",
+            help="Dump input is parsed column by column and its offsets are checked for continuity"
+        )
+        
         hex_input = st.text_area(
             "Hex Input",
             height=150,
@@ -530,54 +3648,304 @@ def main():
         # Convert button
         convert_button2 = st.button("🔄 Convert to Text", type="primary", use_container_width=True)
         
-        if convert_button2 and hex_input.strip():
-            result = hex_to_text(hex_input, encoding.lower())
+        timer = StageTimer(profile=bool(convert_button2 and profile_next))
+        metrics_slot = None
+        with timer:
+            if convert_button2 and hex_input.strip():
+                guess = None
+                text_encoding = encoding
+                if encoding == AUTO_ENCODING:
+                    # Only the start of the input is parsed to pick the encoding
+                    with timer.stage("detect"):
+                        guess = score_encodings(hex_input_sample(hex_input, DUMP_FORMAT_OPTIONS.get(hex_format)))
+                    text_encoding = encoding_label(guess.encoding)
+                # Remember what was converted so the result survives reruns
+                st.session_state["text_request"] = {
+                    "token": uuid.uuid4().hex,
+                    "input": hex_input,
+                    "format": DUMP_FORMAT_OPTIONS.get(hex_format),
+                    "encoding": text_encoding,
+                    "guess": guess
+                }
+                st.session_state["text_viewer_page"] = 1
+                st.session_state.pop("text_viewer_target", None)
+                st.session_state["profile_captured"] = timer.profiling
             
-            if result.startswith("Error:"):
-                st.error(result)
-            else:
-                # Show metrics for the converted result
-                try:
-                    encoding_map = {
-                        'cp037 (ebcdic)': 'cp037',
-                        'utf-8': 'utf-8',
-                        'ascii': 'ascii',
-                        'cp1252 (windows)': 'cp1252',
-                        'iso-8859-1 (latin-1)': 'iso-8859-1'
-                    }
-                    enc = encoding_map.get(encoding.lower(), encoding.lower())
-                    byte_count = len(result.encode(enc))
-                except:
-                    byte_count = len(result.encode('utf-8', errors='replace'))
-                
-                st.markdown(f"""
-                <div class="metrics-container">
-                    <div class="metric-box">
-                        <strong>{byte_count}</strong><br>Bytes
-                    </div>
-                    <div class="metric-box">
-                        <strong>{encoding}</strong><br>Encoding
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Show hexdump of result for verification
-                hexdump_verification = text_to_hexdump(result, encoding.lower(), bytes_per_line)
-                
-                st.markdown("#### ✅ Converted Text as Hexdump")
-                st.markdown(f'<div class="hexdump-output">{hexdump_verification}</div>', unsafe_allow_html=True)
-                
-                # Download button
-                st.download_button(
-                    "📥 Download Text",
-                    result,
-                    file_name=f"converted_text_{encoding.lower()}.txt",
-                    mime="text/plain"
+            request = st.session_state.get("text_request")
+            if request is not None:
+                text_encoding = request["encoding"]
+                if request["guess"]:
+                    render_encoding_guess(request["guess"])
+                job = run_job(
+                    "text", request["token"],
+                    functools.partial(_text_job_task, shared_result_cache(), request["input"], request["format"],
+                                      text_encoding.lower()),
+                    len(request["input"]), "Converting", timer
                 )
+                
+                if job is not None and job.status == 'failed':
+                    st.error(f"Error: {job.error}")
+                elif job is not None:
+                    text_data, decode_errors = job.result
+                    byte_count = len(text_data)
+                    if decode_errors:
+                        st.warning(describe_decode_errors(decode_errors))
+                    
+                    # Show metrics for the converted result
+                    metrics_slot = st.empty()
+                    
+                    # Show hexdump of result for verification, one page at a time
+                    st.markdown("#### ✅ Converted Text as Hexdump")
+                    render_hexdump_viewer(text_data, text_encoding.lower(), bytes_per_line, key="text_viewer", timer=timer,
+                                          squeeze=squeeze)
+                    
+                    # The text is written to a file in the background, only when asked for
+                    render_job_download(
+                        "converted_text", ("text", request["token"]),
+                        functools.partial(export_text, request["input"], text_encoding.lower(), request["format"]),
+                        len(request["input"]), "Text", f"converted_text_{text_encoding.lower()}.txt", "text/plain"
+                    )
+        
+        if metrics_slot is not None:
+            timer.meta = {"bytes": byte_count, "encoding": text_encoding, "bytes_per_line": bytes_per_line}
+            metrics_slot.markdown(metrics_html(
+                [(byte_count, "Bytes"), (text_encoding, "Encoding")] + timing_metrics(timer)
+            ), unsafe_allow_html=True)
+            render_timing_details(timer, "text")
+    
+    with tab3:
+        st.markdown('<div class="section-header">🆚 Binary File Comparison</div>', unsafe_allow_html=True)
+        
+        col_a, col_b = st.columns(2)
+        with col_a:
+            file_a = st.file_uploader("Original File", key="diff_file_a")
+        with col_b:
+            file_b = st.file_uploader("Changed File", key="diff_file_b", help="Compared byte for byte at the same offsets")
+        
+        compare_button = st.button("🆚 Compare Files", type="primary", use_container_width=True)
+        
+        timer = StageTimer(profile=bool(compare_button and profile_next))
+        metrics_slot = None
+        with timer:
+            if compare_button and file_a and file_b:
+                with timer.stage("spool"):
+                    paths = (spooled_upload_path(file_a, "spooled_diff_a"), spooled_upload_path(file_b, "spooled_diff_b"))
+                st.session_state["active_diff"] = {"names": (file_a.name, file_b.name), "paths": paths, "hunks": {}}
+                st.session_state["diff_page"] = 1
+                st.session_state["profile_captured"] = timer.profiling
+            elif compare_button:
+                st.warning("Upload both files to compare them")
+            
+            diff = st.session_state.get("active_diff")
+            if diff and all(os.path.exists(path) for path in diff["paths"]):
+                with map_file(diff["paths"][0]) as a, map_file(diff["paths"][1]) as b:
+                    metrics_slot = st.empty()
+                    diff_encoding = encoding
+                    if encoding == AUTO_ENCODING:
+                        with timer.stage("detect"):
+                            guess = detect_encoding(a)
+                        diff_encoding = render_encoding_guess(guess)
+                    sizes = (len(a), len(b))
+                    summary = active_diff_hunks(diff, max(sizes), bytes_per_line, timer)
+                    if summary is None:
+                        # Metrics wait for the comparison running in the background
+                        metrics_slot = None
+                    else:
+                        hunks, dropped, diff_bytes, diff_ranges = summary
+                        if not hunks:
+                            st.success(f"✅ {diff['names'][0]} and {diff['names'][1]} are identical")
+                        else:
+                            if dropped:
+                                st.warning(f"Only the first {DIFF_MAX_HUNKS} hunks are shown, {dropped} more are in the download")
+                            st.markdown(f"#### 🆚 {html.escape(diff['names'][0])} ↔ {html.escape(diff['names'][1])}")
+                            render_diff_viewer(a, b, hunks, diff_encoding.lower(), bytes_per_line, timer=timer)
+                            
+                            # The full diff is written to a file in the background, only when asked for
+                            diff_key = ("diff",) + diff["paths"] + (diff_encoding.lower(), bytes_per_line)
+                            render_job_download(
+                                "diff", diff_key,
+                                functools.partial(export_diff, diff["paths"][0], diff["paths"][1], diff_encoding.lower(), bytes_per_line),
+                                max(sizes), "Diff", f"diff_{diff['names'][0]}_{diff['names'][1]}.txt", "text/plain"
+                            )
+        
+        if metrics_slot is not None:
+            timer.meta = {"bytes": sizes, "encoding": diff_encoding, "bytes_per_line": bytes_per_line}
+            metrics_slot.markdown(metrics_html(
+                [(sizes[0], "Original Bytes"), (sizes[1], "Changed Bytes"), (diff_bytes, "Differing Bytes"),
+                 (diff_ranges, "Ranges"), (len(hunks) + dropped, "Hunks")] + timing_metrics(timer)
+            ), unsafe_allow_html=True)
+            render_timing_details(timer, "diff")
+    
+    render_cache_stats(cache_stats_slot)
     
     # Footer
     st.markdown("---")
     st.markdown('<div class="footer-tip">💡 <strong>Tip:</strong> This tool mimics the Linux <code>hexdump -C</code> command functionality with enhanced visual styling.</div>', unsafe_allow_html=True)
 
+def cli(argv=None):
+    """Command line entry point, writes a hexdump (or with -r its reverse) to stdout"""
+    parser = argparse.ArgumentParser(
+        prog="python -m hexpad",
+        description="Hexdump a file or stdin in the hexpad layout, or turn a hexdump back into bytes."
+    )
+    parser.add_argument("infile", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("outfile", nargs="?", default="-", help="output file (default: stdout)")
+    parser.add_argument("-e", "--encoding", default="utf-8",
+                        help="encoding used for the ASCII column, e.g. cp037, cp500, cp1047, cp273 or cp285, "
+                             "or auto to detect it from a sample of the input (default: utf-8)")
+    parser.add_argument("-w", "--width", type=int, choices=[8, 16, 32], default=16,
+                        help="bytes per line (default: 16)")
+    parser.add_argument("-r", "--reverse", action="store_true",
+                        help="read a hexdump and write the original bytes")
+    parser.add_argument("-s", "--squeeze", action="store_const", const=True,
+                        help="collapse repeated lines into a single '*' like hexdump -C "
+                             "(default for od and canonical, as the tools do)")
+    parser.add_argument("-v", "--no-squeeze", dest="squeeze", action="store_const", const=False,
+                        help="write every line, like od -v and hexdump -v")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="hexpad",
+                        help="dump format to write, or with -r to read: hexpad, xxd, od (-A x -t x1z), "
+                             "canonical (hexdump -C), c or python arrays, or base64 (default: hexpad)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="worker processes for large files, 0 for one per CPU (default: 1)")
+    parser.add_argument("--records", choices=RECORD_FORMATS,
+                        help="dump each record separately: fixed (needs --lrecl), variable (RDW), blocked (BDW + RDW) or newline")
+    parser.add_argument("--lrecl", type=int, default=0, help="record length for --records fixed")
+    parser.add_argument("--copybook", metavar="FILE",
+                        help="with --records fixed, write the copybook's fields of every record as CSV instead of a dump")
+    parser.add_argument("--diff", metavar="FILE",
+                        help="compare the input with FILE and write the differing lines side by side, exit status 1 if they differ")
+    parser.add_argument("--search", metavar="PATTERN",
+                        help="print the offset and dump line of every match instead of a dump, exit status 1 if none")
+    parser.add_argument("--search-mode", choices=SEARCH_MODES, default="text",
+                        help="treat --search as text in the --encoding, hex bytes or a byte regex (default: text)")
+    parser.add_argument("--timings", action="store_true",
+                        help="print per-stage timings as JSON to stderr when done")
+    parser.add_argument("--profile", action="store_true",
+                        help="include a cProfile summary in the --timings output")
+    parser.add_argument("--ui", action="store_true", help="launch the Streamlit web UI instead")
+    args = parser.parse_args(argv)
+    if args.squeeze is None:
+        args.squeeze = args.format in SQUEEZE_BY_DEFAULT
+    
+    if args.ui:
+        # Streamlit is only imported when the UI is actually wanted
+        from streamlit.web import cli as streamlit_cli
+        sys.argv = ["streamlit", "run", os.path.abspath(__file__)]
+        return streamlit_cli.main()
+    
+    # Modes other than a plain dump write their own layout and never squeeze
+    mode = next((flag for flag, value in [("--records", args.records), ("--copybook", args.copybook),
+                                          ("--diff", args.diff), ("--search", args.search)] if value is not None), None)
+    if mode and args.reverse:
+        parser.error(f"-r can't be combined with {mode}")
+    if mode and args.format != "hexpad":
+        parser.error(f"-f {args.format} can't be combined with {mode}")
+    if args.squeeze and not args.reverse:
+        if mode:
+            parser.error(f"-s can't be combined with {mode}")
+        if not get_output_format(args.format).squeeze:
+            parser.error(f"-s can't be combined with -f {args.format}, which has no squeeze")
+    if args.encoding != "auto":
+        try:
+            codecs.lookup(resolve_encoding(args.encoding))
+        except LookupError:
+            parser.error(f"unknown encoding {args.encoding!r}")
+    
+    timer = StageTimer(profile=args.timings and args.profile)
+    status = 0
+    # Encoding detection may swap stdin for a spooled copy of it
+    input_name = args.infile
+    try:
+        with contextlib.ExitStack() as stack:
+            infile = sys.stdin.buffer if args.infile == "-" else stack.enter_context(open(args.infile, "rb"))
+            outfile = sys.stdout.buffer if args.outfile == "-" else stack.enter_context(open(args.outfile, "wb"))
+            with timer:
+                if args.encoding == "auto" and not args.reverse:
+                    # Detection samples the whole input, so stdin is spooled first
+                    if args.infile == "-":
+                        args.infile = spool_to_tempfile(infile)
+                        stack.callback(os.remove, args.infile)
+                        infile = stack.enter_context(open(args.infile, "rb"))
+                    with timer.stage("detect"):
+                        guess = detect_encoding(args.infile)
+                    print(f"hexpad: detected {guess.encoding} ({guess.confidence:.0%} confidence)", file=sys.stderr)
+                    args.encoding = guess.encoding
+                if args.reverse:
+                    # Parsing is timed inside, so "write" only keeps the buffered writes
+                    with timer.stage("write"):
+                        parse_hexdump_to(infile, outfile, timer, args.format)
+                elif args.diff:
+                    # Both sides are compared through memory maps
+                    path = args.infile
+                    if path == "-":
+                        path = spool_to_tempfile(infile)
+                        stack.callback(os.remove, path)
+                    for block in timer.timed_iter("compare", iter_diff_text(path, args.diff, args.encoding, args.width)):
+                        status = 1
+                        with timer.stage("write"):
+                            outfile.write(block.encode('ascii'))
+                elif args.search is not None:
+                    regex, overlap = compile_search(args.search, args.search_mode, args.encoding)
+                    path = args.infile
+                    if path == "-":
+                        path = spool_to_tempfile(infile)
+                        stack.callback(os.remove, path)
+                    data = stack.enter_context(map_file(path))
+                    table = display_table_for(args.encoding)
+                    status = 1
+                    for offset, length in timer.timed_iter("search", iter_search(data, regex, overlap)):
+                        status = 0
+                        start = offset - offset % args.width
+                        line = render_hexdump_lines(data[start:start + args.width], start, args.width, table)[0]
+                        with timer.stage("write"):
+                            outfile.write(f"{offset}: {line}\n".encode('ascii'))
+                else:
+                    if args.copybook:
+                        if args.records != "fixed":
+                            raise ValueError("--copybook needs --records fixed and an --lrecl")
+                        with open(args.copybook) as f:
+                            fields = parse_copybook(f.read())
+                        # Fields are decoded straight from a mapping of the input
+                        path = args.infile
+                        if path == "-":
+                            path = spool_to_tempfile(infile)
+                            stack.callback(os.remove, path)
+                        data = stack.enter_context(map_file(path))
+                        blocks = iter_copybook_csv(data, fields, args.lrecl, args.encoding)
+                    elif args.records:
+                        blocks = iter_record_hexdump(infile, args.records, args.encoding, args.width, args.lrecl)
+                    elif args.jobs != 1 and args.infile != "-":
+                        blocks = iter_hexdump_parallel(args.infile, args.encoding, args.width, workers=args.jobs or None,
+                                                       squeeze=args.squeeze, output_format=args.format,
+                                                       name=array_name(input_name))
+                    else:
+                        name = array_name(None if input_name == "-" else input_name)
+                        blocks = iter_hexdump(infile, args.encoding, args.width, args.squeeze, args.format, name)
+                    # Each block covers thousands of lines, so writes stay large
+                    for block in timer.timed_iter("format", blocks):
+                        with timer.stage("write"):
+                            outfile.write(block.encode('utf-8' if args.copybook else 'ascii'))
+                with timer.stage("write"):
+                    outfile.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head), like hexdump just stop
+        sys.stderr.close()
+        return 0
+    except (OSError, ValueError, LookupError) as e:
+        # Missing files, malformed input and unknown encodings are reported without a traceback
+        message = f"{e.filename}: {e.strerror}" if isinstance(e, OSError) and e.filename else e
+        print(f"hexpad: {message}", file=sys.stderr)
+        return 1
+    
+    if args.timings:
+        timer.meta = {"input": input_name, "encoding": args.encoding, "bytes_per_line": args.width, "reverse": args.reverse}
+        print(timer.to_json(), file=sys.stderr)
+    return status
+
 if __name__ == "__main__":
-    main()
+    # `streamlit run hexpad.py` executes this file as __main__ too, with
+    # Streamlit already loaded; anything else is the command line tool
+    if "streamlit" in sys.modules:
+        main()
+    else:
+        sys.exit(cli())
@@ -0,0 +1,139 @@
+"""Tests for copybook parsing and the packed/zoned decimal decoders.
+
+Run from the repository root:
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+DUPLICATE_COPYBOOK = """
+       01  CUSTOMER-RECORD.
+           05  BILLING.
+               10  CUST-ID       PIC X(2).
+           05  SHIPPING.
+               10  CUST-ID       PIC X(2).
+           05  CONTACT.
+               10  CUST-ID       PIC X(2).
+"""
+
+
+def field_layout(fields):
+    return [(field.name, field.offset, field.length) for field in fields]
+
+
+def test_duplicate_names_get_distinct_suffixes():
+    fields = hexpad.parse_copybook(DUPLICATE_COPYBOOK)
+    assert field_layout(fields) == [('CUST-ID', 0, 2), ('CUST-ID-1', 2, 2), ('CUST-ID-2', 4, 2)]
+
+
+def test_duplicate_names_keep_every_csv_column():
+    fields = hexpad.parse_copybook(DUPLICATE_COPYBOOK)
+    data = 'AABBCC'.encode('cp037')
+    assert hexpad.copybook_to_csv(data, fields, 6).splitlines() == [
+        'RECORD,CUST-ID,CUST-ID-1,CUST-ID-2',
+        '1,AA,BB,CC',
+    ]
+
+
+def test_suffix_skips_names_already_declared():
+    fields = hexpad.parse_copybook("""
+       01  REC.
+           05  ID-1   PIC X.
+           05  ID     PIC X.
+           05  ID     PIC X.
+""")
+    assert [field.name for field in fields] == ['ID-1', 'ID', 'ID-2']
+
+
+def test_fillers_are_not_renamed():
+    fields = hexpad.parse_copybook("""
+       01  REC.
+           05  FILLER   PIC X(2).
+           05  NAME     PIC X(3).
+           05  FILLER   PIC X.
+""")
+    assert field_layout(fields) == [('FILLER', 0, 2), ('NAME', 2, 3), ('FILLER', 5, 1)]
+
+
+def test_redefines_shares_the_redefined_offset():
+    fields = hexpad.parse_copybook("""
+       01  REC.
+           05  KEY          PIC X(4).
+           05  DATE-TEXT    PIC X(8).
+           05  DATE-NUM     REDEFINES DATE-TEXT PIC 9(8).
+           05  AMOUNT       PIC S9(5) COMP-3.
+""")
+    assert field_layout(fields) == [('KEY', 0, 4), ('DATE-TEXT', 4, 8), ('DATE-NUM', 4, 8), ('AMOUNT', 12, 3)]
+    assert hexpad.copybook_length(fields) == 15
+
+
+def test_redefines_of_unknown_field_is_rejected():
+    with pytest.raises(ValueError, match='REDEFINES unknown field'):
+        hexpad.parse_copybook("01 REC. 05 B REDEFINES A PIC X.")
+
+
+def test_occurs_expands_into_indexed_fields():
+    fields = hexpad.parse_copybook("""
+       01  REC.
+           05  COUNT        PIC 9(2).
+           05  ITEM         PIC X(3) OCCURS 3 TIMES.
+           05  ITEMS-ALL    REDEFINES ITEM PIC X(9).
+""")
+    assert field_layout(fields) == [
+        ('COUNT', 0, 2), ('ITEM(1)', 2, 3), ('ITEM(2)', 5, 3), ('ITEM(3)', 8, 3), ('ITEMS-ALL', 2, 9),
+    ]
+
+
+def test_occurs_on_group_is_rejected():
+    with pytest.raises(ValueError, match='elementary items'):
+        hexpad.parse_copybook("01 REC. 05 GRP OCCURS 2. 10 A PIC X.")
+
+
+def test_binary_and_packed_lengths():
+    fields = hexpad.parse_copybook("""
+       01  REC.
+           05  SMALL   PIC S9(4) COMP.
+           05  MEDIUM  PIC 9(9) BINARY.
+           05  LARGE   PIC S9(18) COMP.
+           05  PACKED  PIC S9(7)V99 COMP-3.
+""")
+    assert [(field.name, field.length, field.kind) for field in fields] == [
+        ('SMALL', 2, 'binary'), ('MEDIUM', 4, 'binary'), ('LARGE', 8, 'binary'), ('PACKED', 5, 'packed'),
+    ]
+    assert fields[3].scale == 2
+
+
+def test_decode_packed():
+    column = np.array([[0x12, 0x34, 0x5C], [0x12, 0x34, 0x5D], [0x00, 0x00, 0x0F], [0x1A, 0x34, 0x5C], [0x12, 0x34, 0x56]],
+                      dtype=np.uint8)
+    values, invalid = hexpad._decode_packed(column)
+    assert values[:3].tolist() == [12345, -12345, 0]
+    # A non-digit nibble and a digit in the sign position are both invalid
+    assert invalid.tolist() == [False, False, False, True, True]
+
+
+def test_decode_zoned():
+    column = np.array([[0xF1, 0xF2, 0xC3], [0xF1, 0xF2, 0xD3], [0xF0, 0xF0, 0xF7], [0xF1, 0x42, 0xC3], [0xF1, 0xF2, 0x33]],
+                      dtype=np.uint8)
+    values, invalid = hexpad._decode_zoned(column)
+    assert values[:3].tolist() == [123, -123, 7]
+    # A non-F zone before the last byte and a non-sign last zone are both invalid
+    assert invalid.tolist() == [False, False, False, True, True]
+
+
+def test_decoded_decimals_are_scaled_exactly():
+    fields = hexpad.parse_copybook("""
+       01  REC.
+           05  PRICE   PIC S9(3)V99 COMP-3.
+           05  QTY     PIC S9(3)V9.
+""")
+    data = bytes([0x12, 0x34, 0x5D]) + bytes([0xF0, 0xF1, 0xF2, 0xC5])
+    assert hexpad.copybook_to_csv(data, fields, 7).splitlines() == ['RECORD,PRICE,QTY', '1,-123.45,12.5']
@@ -0,0 +1,69 @@
+"""Tests for codepage auto-detection."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+ENGLISH = "The quick brown fox [jumps] over the lazy dog! Customer record 00123, balance $45.00 | ok.\n" * 20
+GERMAN = "Grüße aus München, Straße Nr. 12 - schön! Ärger über Öl.\n" * 20
+
+
+@pytest.mark.parametrize('data, expected', [
+    (ENGLISH.encode('ascii'), 'utf-8'),
+    (GERMAN.encode('utf-8'), 'utf-8'),
+    (GERMAN.encode('cp1252'), 'cp1252'),
+    (ENGLISH.encode('cp037'), 'cp037'),
+    (ENGLISH.encode('cp1047'), 'cp1047'),
+    (GERMAN.encode('cp273'), 'cp273'),
+])
+def test_detects_the_codepage(data, expected):
+    guess = hexpad.detect_encoding(data)
+    assert guess.encoding == expected
+    assert guess.confidence >= hexpad.DETECT_MIN_CONFIDENCE
+
+
+def test_ebcdic_records_with_packed_fields():
+    record = ENGLISH[:60].encode('cp037') + bytes.fromhex('00000012345c') + b'\x40' * 20
+    guess = hexpad.detect_encoding(record * 50)
+    assert guess.encoding == 'cp037'
+    assert guess.confidence >= hexpad.DETECT_MIN_CONFIDENCE
+
+
+def test_binary_data_has_low_confidence():
+    guess = hexpad.detect_encoding(os.urandom(100000))
+    assert guess.confidence < hexpad.DETECT_MIN_CONFIDENCE
+
+
+def test_empty_sample_has_no_confidence():
+    guess = hexpad.score_encodings(b'')
+    assert guess.encoding == hexpad.DETECT_ENCODINGS[0]
+    assert guess.confidence == 0.0
+
+
+def test_every_candidate_is_scored():
+    guess = hexpad.score_encodings(b'hello', ['cp500', 'ascii'])
+    assert set(guess.scores) == {'cp500', 'ascii'}
+    assert guess.encoding == 'ascii'
+
+
+def test_large_inputs_are_sampled(tmp_path):
+    # The windows spread over the file all land in EBCDIC text
+    data = ENGLISH.encode('cp037') * 2000
+    assert len(data) > hexpad.DETECT_SAMPLE_WINDOWS * hexpad.DETECT_SAMPLE_BYTES
+    path = tmp_path / 'big.bin'
+    path.write_bytes(data)
+    assert hexpad.detect_encoding(str(path)) == hexpad.detect_encoding(data)
+    windows = hexpad._sample_windows(0, len(data), hexpad.DETECT_SAMPLE_WINDOWS, hexpad.DETECT_SAMPLE_BYTES)
+    assert len(windows) == hexpad.DETECT_SAMPLE_WINDOWS
+    assert windows[0][0] == 0 and windows[-1][1] > len(data) - hexpad.DETECT_SAMPLE_BYTES
+
+
+def test_hex_input_sample():
+    data = GERMAN.encode('cp273')
+    assert hexpad.hex_input_sample(data.hex(' ')) == data
+    assert hexpad.hex_input_sample(hexpad.bytes_to_hexdump(data, output_format='xxd'), 'xxd') == data
+    assert hexpad.hex_input_sample('not a dump', 'hexpad') == b''
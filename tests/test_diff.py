@@ -0,0 +1,95 @@
+"""Tests for the block-wise binary diff."""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+
+def byte_ranges(a, b):
+    """Differing ranges found one byte at a time"""
+    ranges = []
+    for i in range(max(len(a), len(b))):
+        if a[i:i + 1] != b[i:i + 1]:
+            if ranges and ranges[-1][1] == i:
+                ranges[-1] = (ranges[-1][0], i + 1)
+            else:
+                ranges.append((i, i + 1))
+    return ranges
+
+
+def test_identical_buffers_have_no_ranges():
+    data = os.urandom(10000)
+    assert list(hexpad.iter_diff_ranges(data, bytearray(data))) == []
+
+
+def test_single_byte_change():
+    a = bytes(100000)
+    b = bytearray(a)
+    b[12345] = 1
+    assert list(hexpad.iter_diff_ranges(a, b)) == [(12345, 12346)]
+
+
+@pytest.mark.parametrize('block_size', [7, 64, hexpad.DIFF_SUB_BLOCK_SIZE, hexpad.DIFF_BLOCK_SIZE])
+def test_ranges_match_a_byte_by_byte_scan(block_size):
+    rng = random.Random(block_size)
+    a = bytes(rng.randrange(4) for _ in range(3 * hexpad.DIFF_SUB_BLOCK_SIZE + 17))
+    b = bytearray(a)
+    # Changes on and across block and sub-block boundaries, and runs of several bytes
+    for start in [0, block_size - 1, hexpad.DIFF_SUB_BLOCK_SIZE - 2, 2 * hexpad.DIFF_SUB_BLOCK_SIZE, len(a) - 1]:
+        for i in range(start, min(start + 3, len(a))):
+            b[i] ^= 0xff
+    for i in rng.sample(range(len(a)), 50):
+        b[i] ^= 0x10
+    assert list(hexpad.iter_diff_ranges(a, b, block_size)) == byte_ranges(a, b)
+
+
+def test_extra_bytes_of_the_longer_buffer_differ():
+    assert list(hexpad.iter_diff_ranges(b'abcdef', b'abc')) == [(3, 6)]
+    assert list(hexpad.iter_diff_ranges(b'abc', b'abXdef')) == [(2, 6)]
+    assert list(hexpad.iter_diff_ranges(b'', b'ab')) == [(0, 2)]
+
+
+def test_progress_reports_block_starts():
+    done = []
+    list(hexpad.iter_diff_ranges(bytes(100), bytes(100), block_size=40, progress=done.append))
+    assert done == [0, 40, 80]
+
+
+def test_hunks_add_context_and_merge():
+    hunks = list(hexpad.iter_diff_hunks([(0, 1), (80, 81), (1600, 1601)], 2000, 16, context=2))
+    assert hunks == [(0, 8), (98, 103)]
+
+
+def test_long_hunks_are_split():
+    hunks = list(hexpad.iter_diff_hunks([(0, 1000)], 1000, 16, context=0, max_lines=20))
+    assert hunks == [(0, 20), (20, 40), (40, 60), (60, 63)]
+
+
+def test_summary_counts_every_range():
+    a = bytes(16 * 1000)
+    b = bytearray(a)
+    for line in range(0, 1000, 100):
+        b[line * 16:line * 16 + 3] = b'xyz'
+    kept, dropped, diff_bytes, ranges = hexpad.summarize_diff(a, b, 16, max_hunks=4)
+    assert (len(kept), dropped, diff_bytes, ranges) == (4, 6, 30, 10)
+
+
+def test_diff_text_marks_changed_lines():
+    a = b'A' * 48
+    b = b'A' * 16 + b'B' + b'A' * 31
+    lines = hexpad.diff_to_text(a, b).splitlines()
+    assert lines[0] == '@@ offsets 0-48 @@'
+    changed = [line for line in lines[1:] if '  |  ' in line]
+    assert len(changed) == 1 and changed[0].startswith('16 ')
+
+
+def test_diff_of_files(tmp_path):
+    path_a, path_b = tmp_path / 'a.bin', tmp_path / 'b.bin'
+    path_a.write_bytes(b'same' * 100)
+    path_b.write_bytes(b'same' * 99 + b'diff')
+    assert hexpad.diff_to_text(str(path_a), str(path_b)) == hexpad.diff_to_text(b'same' * 100, b'same' * 99 + b'diff')
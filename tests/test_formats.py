@@ -0,0 +1,93 @@
+"""Tests for the output formats and reading each of them back."""
+import base64
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+SAMPLE = bytes(range(256)) + b'The quick brown fox' + bytes(40)
+
+
+def dump(data, output_format, bytes_per_line=16, squeeze=False, name='data'):
+    return ''.join(hexpad.iter_hexdump(data, 'utf-8', bytes_per_line, squeeze, output_format, name))
+
+
+def parse(text, output_format):
+    return b''.join(hexpad.iter_parse_format(text, output_format))
+
+
+@pytest.mark.parametrize('output_format', list(hexpad.OUTPUT_FORMATS))
+@pytest.mark.parametrize('bytes_per_line', [8, 16, 32])
+def test_round_trip(output_format, bytes_per_line):
+    assert parse(dump(SAMPLE, output_format, bytes_per_line), output_format) == SAMPLE
+
+
+@pytest.mark.parametrize('output_format', list(hexpad.OUTPUT_FORMATS))
+def test_round_trip_empty(output_format):
+    assert parse(dump(b'', output_format), output_format) == b''
+
+
+@pytest.mark.parametrize('output_format', list(hexpad.OUTPUT_FORMATS))
+def test_round_trip_across_line_batches(output_format):
+    data = os.urandom(64 * hexpad.HEXDUMP_BLOCK_LINES + 11)
+    assert parse(dump(data, output_format), output_format) == data
+
+
+def test_formats_without_squeeze_ignore_it():
+    for name, fmt in hexpad.OUTPUT_FORMATS.items():
+        if not fmt.squeeze:
+            assert dump(bytes(64), name, squeeze=True) == dump(bytes(64), name)
+
+
+def test_xxd_layout():
+    assert dump(b'hi there', 'xxd') == '00000000: 6869 2074 6865 7265                      hi there\n'
+
+
+def test_c_array_layout():
+    assert dump(b'hi', 'c', name=hexpad.array_name('my-logo.png')).split('\n') == [
+        'unsigned char my_logo_png[] = {',
+        '  0x68, 0x69,',
+        '};',
+        'unsigned int my_logo_png_len = 2;',
+        '',
+    ]
+
+
+def test_python_literal_evaluates_to_the_bytes():
+    namespace = {}
+    exec(dump(SAMPLE, 'python'), namespace)
+    assert namespace['data'] == SAMPLE
+
+
+def test_base64_decodes_with_the_standard_library():
+    assert base64.b64decode(dump(SAMPLE, 'base64')) == SAMPLE
+
+
+@pytest.mark.skipif(shutil.which('od') is None, reason="needs od")
+@pytest.mark.parametrize('squeeze', [False, True])
+def test_od_matches_the_tool(squeeze):
+    args = ['od', '-A', 'x', '-t', 'x1z'] + ([] if squeeze else ['-v'])
+    expected = subprocess.run(args, input=SAMPLE, capture_output=True, check=True).stdout.decode('ascii')
+    assert dump(SAMPLE, 'od', squeeze=squeeze) == expected
+
+
+@pytest.mark.skipif(shutil.which('xxd') is None, reason="needs xxd")
+def test_xxd_matches_the_tool():
+    expected = subprocess.run(['xxd'], input=SAMPLE, capture_output=True, check=True).stdout.decode('ascii')
+    assert dump(SAMPLE, 'xxd') == expected
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="Unknown output format 'hex'"):
+        hexpad.get_output_format('hex')
+
+
+def test_truncated_base64_is_rejected():
+    with pytest.raises(ValueError, match='base64 data is truncated'):
+        parse('aGk', 'base64')
@@ -0,0 +1,93 @@
+"""Tests that incremental re-dumps after an edit match a full dump."""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+
+def full_lines(data, encoding='utf-8', bytes_per_line=16):
+    return hexpad.render_hexdump_lines(data, 0, bytes_per_line, hexpad.display_table_for(encoding))
+
+
+def edits(rng, data, bytes_per_line):
+    """A mix of the edits typing produces, including ones that move data by whole lines"""
+    pos = rng.randrange(len(data) + 1)
+    yield data[:pos] + b'X' + data[pos:]
+    yield data[:pos] + data[pos + 1:]
+    yield data[:pos] + b'Y' + data[pos + 1:]
+    yield data[:pos] + os.urandom(bytes_per_line * 3) + data[pos:]
+    yield data[:pos] + data[pos + bytes_per_line * 2:]
+    yield data + b'appended'
+    yield data[:pos]
+    yield b''
+
+
+@pytest.mark.parametrize('bytes_per_line', [8, 16, 32])
+def test_edits_match_a_full_dump(bytes_per_line):
+    rng = random.Random(bytes_per_line)
+    hexdump = hexpad.IncrementalHexdump('utf-8', bytes_per_line)
+    data = os.urandom(5000)
+    hexdump.update(data)
+    for _ in range(20):
+        for edited in edits(rng, data, bytes_per_line):
+            hexdump.update(edited)
+            assert hexdump.lines() == full_lines(edited, 'utf-8', bytes_per_line)
+        data = data[:-1] + os.urandom(300)
+        hexdump.update(data)
+
+
+def test_offsets_past_the_padded_column():
+    # Offsets of seven digits and more widen the offset column
+    data = os.urandom(1000100)
+    hexdump = hexpad.IncrementalHexdump()
+    hexdump.update(data)
+    edited = data[:10] + b'Z' + data[10:]
+    hexdump.update(edited)
+    assert hexdump.lines(62490, 20) == hexpad.hexdump_window(edited, 62490, 20)
+
+
+def test_only_touched_lines_are_reformatted():
+    data = bytes(range(256)) * 4
+    hexdump = hexpad.IncrementalHexdump()
+    assert hexdump.update(data) == 64
+    assert hexdump.update(data) == 0
+    assert hexdump.update(data[:100] + b'!' + data[101:]) == 1
+    assert hexdump.update(data) == 1
+    # A whole line inserted leaves every later line as it was
+    assert hexdump.update(data[:32] + b'L' * 16 + data[32:]) == 1
+
+
+def test_ebcdic_text_column():
+    data = 'EBCDIC TEXT LINE'.encode('cp037') * 10
+    hexdump = hexpad.IncrementalHexdump('cp037')
+    hexdump.update(data)
+    edited = data.replace(b'\xc5', b'\xc1', 3)
+    hexdump.update(edited)
+    assert hexdump.lines() == full_lines(edited, 'cp037')
+
+
+def test_exported_bodies_match_the_dump():
+    data = os.urandom(3000)
+    hexdump = hexpad.IncrementalHexdump()
+    hexdump.update(data)
+    hexdump.update(data[:5] + data[6:])
+    assert ''.join(hexpad.iter_body_blocks(hexdump.bodies, 16)) == ''.join(hexpad.iter_hexdump(data[:5] + data[6:]))
+
+
+@pytest.mark.parametrize('from_end', [False, True])
+def test_common_run_length(from_end):
+    rng = random.Random(int(from_end))
+    a = os.urandom(3 * hexpad.DIFF_SUB_BLOCK_SIZE)
+    for _ in range(50):
+        b = bytearray(a)
+        pos = rng.randrange(len(a))
+        b[pos] ^= 1
+        expected = len(a) - 1 - pos if from_end else pos
+        assert hexpad.common_run_length(a, bytes(b), len(a), from_end) == expected
+    assert hexpad.common_run_length(a, a, len(a), from_end) == len(a)
+    assert hexpad.common_run_length(a, a, 10, from_end) == 10
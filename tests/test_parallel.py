@@ -0,0 +1,57 @@
+"""Tests that the process-pool hexdump writes exactly what the serial one does."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+# Small chunks so a few KB are split across several worker tasks
+CHUNK_SIZE = 4096
+
+
+def sample_data():
+    # Runs of repeated lines straddle the chunk boundaries, and the tail is a partial line
+    return os.urandom(5000) + bytes(3 * CHUNK_SIZE) + os.urandom(100) + b'\xff' * (CHUNK_SIZE + 40) + b'end'
+
+
+def parallel_dump(source, **kwargs):
+    blocks = hexpad.iter_hexdump_parallel(source, workers=2, threshold=0, chunk_size=CHUNK_SIZE, **kwargs)
+    return ''.join(blocks)
+
+
+def serial_dump(source, encoding='utf-8', bytes_per_line=16, squeeze=False, output_format='hexpad', name='data'):
+    return ''.join(hexpad.iter_hexdump(source, encoding, bytes_per_line, squeeze, output_format, name))
+
+
+@pytest.mark.parametrize('output_format', ['hexpad', 'od', 'canonical', 'xxd', 'c', 'base64'])
+@pytest.mark.parametrize('squeeze', [False, True])
+def test_parallel_buffer_matches_serial(output_format, squeeze):
+    data = sample_data()
+    kwargs = dict(squeeze=squeeze, output_format=output_format)
+    assert parallel_dump(data, **kwargs) == serial_dump(data, **kwargs)
+
+
+@pytest.mark.parametrize('bytes_per_line', [8, 32])
+def test_parallel_file_matches_serial(tmp_path, bytes_per_line):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(sample_data())
+    kwargs = dict(encoding='cp037', bytes_per_line=bytes_per_line, squeeze=True)
+    assert parallel_dump(str(path), **kwargs) == serial_dump(str(path), **kwargs)
+
+
+def test_parallel_empty_input_matches_serial():
+    assert parallel_dump(b'', output_format='c') == serial_dump(b'', output_format='c')
+
+
+def test_small_input_is_dumped_serially():
+    data = sample_data()
+    blocks = hexpad.iter_hexdump_parallel(data, workers=2, chunk_size=CHUNK_SIZE)
+    assert ''.join(blocks) == serial_dump(data)
+
+
+def test_bytes_to_hexdump_parallel_flag():
+    data = b'parallel' * 10
+    assert hexpad.bytes_to_hexdump(data, parallel=True) == hexpad.bytes_to_hexdump(data)
@@ -0,0 +1,69 @@
+"""Tests for reading hexpad dumps back into bytes."""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+SAMPLE = bytes(range(256)) * 3 + b'tail'
+
+
+@pytest.mark.parametrize('bytes_per_line', [8, 16, 32])
+def test_round_trip(bytes_per_line):
+    dump = hexpad.bytes_to_hexdump(SAMPLE, 'utf-8', bytes_per_line)
+    assert hexpad.parse_hexdump_bytes(dump) == SAMPLE
+
+
+def test_round_trip_across_line_batches():
+    data = os.urandom(16 * hexpad.HEXDUMP_BLOCK_LINES * 2 + 5)
+    dump = hexpad.bytes_to_hexdump(data)
+    assert hexpad.parse_hexdump_bytes(dump) == data
+    out = io.BytesIO()
+    assert hexpad.parse_hexdump_to(io.BytesIO(dump.encode('ascii')), out) == len(data)
+    assert out.getvalue() == data
+
+
+def test_round_trip_ebcdic_text_column():
+    # The text column may hold '|' and other characters the parser must skip
+    data = 'PIPE|AND|BARS'.encode('cp037') + b'|||'
+    dump = hexpad.bytes_to_hexdump(data, 'cp037')
+    assert hexpad.parse_hexdump_bytes(dump) == data
+
+
+def test_empty_dump():
+    assert hexpad.parse_hexdump_bytes('') == b''
+
+
+def test_parse_hexdump_returns_hex():
+    assert hexpad.parse_hexdump(hexpad.bytes_to_hexdump(b'AB')) == '4142'
+
+
+@pytest.mark.parametrize('line', ['0       41 42 43', '0       41 423'])
+def test_line_without_text_column_is_rejected(line):
+    # The bulk path must not drop the last character of a line that has no '|'
+    with pytest.raises(ValueError, match='Line 1: not in hexdump layout'):
+        hexpad.parse_hexdump_bytes(line + '\n')
+
+
+def test_malformed_line_is_reported_by_number():
+    lines = hexpad.bytes_to_hexdump(SAMPLE).split('\n')
+    lines[5] = lines[5].replace(' 5f ', ' 5 ')
+    with pytest.raises(ValueError, match='Line 6: invalid hex bytes'):
+        hexpad.parse_hexdump_bytes('\n'.join(lines))
+
+
+def test_offset_gap_is_rejected():
+    lines = hexpad.bytes_to_hexdump(SAMPLE).split('\n')
+    del lines[3]
+    with pytest.raises(ValueError, match='Line 4: offset 64 does not continue from 48'):
+        hexpad.parse_hexdump_bytes('\n'.join(lines))
+
+
+def test_invalid_hex_bytes_are_rejected():
+    line = hexpad.bytes_to_hexdump(b'AB').replace('42', '4g')
+    with pytest.raises(ValueError, match='Line 1: invalid hex bytes'):
+        hexpad.parse_hexdump_bytes(line)
@@ -0,0 +1,109 @@
+"""Tests for record splitting and the record index."""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+
+def rdw(body):
+    return (len(body) + 4).to_bytes(2, 'big') + b'\0\0' + body
+
+
+def bdw(records):
+    block = b''.join(records)
+    return (len(block) + 4).to_bytes(2, 'big') + b'\0\0' + block
+
+
+VARIABLE = rdw(b'first') + rdw(b'') + rdw(b'third record')
+BLOCKED = bdw([rdw(b'one'), rdw(b'two')]) + bdw([rdw(b'three')])
+
+
+def test_fixed_records_keep_a_short_last_record():
+    assert list(hexpad.iter_records(b'AAAABBBBCC', 'fixed', 4)) == [(0, b'AAAA'), (4, b'BBBB'), (8, b'CC')]
+
+
+def test_variable_records_point_past_their_rdw():
+    assert list(hexpad.iter_records(VARIABLE, 'variable')) == [(4, b'first'), (13, b''), (17, b'third record')]
+
+
+def test_blocked_records_skip_their_bdw():
+    assert list(hexpad.iter_records(BLOCKED, 'blocked')) == [(8, b'one'), (15, b'two'), (26, b'three')]
+
+
+def test_newline_records_drop_the_delimiter():
+    assert list(hexpad.iter_records(b'ab\n\ncd', 'newline')) == [(0, b'ab'), (3, b''), (4, b'cd')]
+
+
+def test_records_from_a_file_object():
+    assert list(hexpad.iter_records(io.BytesIO(VARIABLE), 'variable')) == list(hexpad.iter_records(VARIABLE, 'variable'))
+
+
+@pytest.mark.parametrize('data, message', [
+    (VARIABLE[:-3], 'RDW at offset 13 says 16 bytes, but the data ends first'),
+    (b'\0\x08\x80\0data', 'spanned records are not supported'),
+    (b'\0\x02\0\0', 'invalid length 2'),
+    (b'\0\x09', 'RDW at offset 0 is truncated'),
+])
+def test_broken_variable_records_are_rejected(data, message):
+    with pytest.raises(ValueError, match=message):
+        list(hexpad.iter_records(data, 'variable'))
+
+
+def test_record_overrunning_its_block_is_rejected():
+    data = (12).to_bytes(2, 'big') + b'\0\0' + rdw(b'toolong')
+    with pytest.raises(ValueError, match='overruns the block'):
+        list(hexpad.iter_records(data, 'blocked'))
+
+
+def test_fixed_records_need_an_lrecl():
+    with pytest.raises(ValueError, match='positive LRECL'):
+        hexpad.RecordIndex.build(b'data', 'fixed', 0)
+
+
+@pytest.mark.parametrize('data, record_format, lrecl', [
+    (bytes(range(200)), 'fixed', 30),
+    (VARIABLE, 'variable', 0),
+    (BLOCKED, 'blocked', 0),
+    (b'line one\nline two\n\nlast', 'newline', 0),
+])
+def test_index_matches_a_sequential_scan(data, record_format, lrecl):
+    records = list(hexpad.iter_records(data, record_format, lrecl))
+    index = hexpad.RecordIndex.build(data, record_format, lrecl)
+    assert len(index) == len(records)
+    assert [index.record(data, n) for n in range(len(index))] == records
+    for number, (offset, record) in enumerate(records):
+        # Every byte of a record, and of the descriptor after it, belongs to that record
+        assert index.find(offset) == number
+        assert index.find(offset + max(len(record) - 1, 0)) == number
+
+
+def test_index_reports_progress():
+    data = rdw(b'x') * (hexpad.RECORD_PROGRESS_RECORDS + 1)
+    done = []
+    index = hexpad.RecordIndex.build(data, 'variable', progress=done.append)
+    assert len(index) == hexpad.RECORD_PROGRESS_RECORDS + 1
+    assert done == [index.offset(hexpad.RECORD_PROGRESS_RECORDS - 1), index.offset(hexpad.RECORD_PROGRESS_RECORDS)]
+
+
+def test_record_number_out_of_range():
+    index = hexpad.RecordIndex.build(VARIABLE, 'variable')
+    with pytest.raises(IndexError, match=r'Record 4 is out of range \(1-3\)'):
+        index.offset(3)
+
+
+@pytest.mark.parametrize('record_format, lrecl', [('fixed', 80), ('variable', 0), ('newline', 0)])
+def test_empty_index_finds_no_record(record_format, lrecl):
+    index = hexpad.RecordIndex.build(b'', record_format, lrecl)
+    assert len(index) == 0
+    assert index.find(0) is None
+
+
+def test_record_hexdump_numbers_each_record():
+    dump = hexpad.records_to_hexdump(VARIABLE, 'variable')
+    headers = [line for line in dump.splitlines() if line.startswith('Record')]
+    assert headers == ['Record 1  offset 4  length 5', 'Record 2  offset 13  length 0', 'Record 3  offset 17  length 12']
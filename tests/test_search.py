@@ -0,0 +1,79 @@
+"""Tests for chunked pattern search."""
+import io
+import os
+import random
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+
+def whole_matches(regex, data):
+    return [(m.start(), m.end() - m.start()) for m in regex.finditer(data)]
+
+
+def sample_data():
+    rng = random.Random(17)
+    return bytes(rng.choice(b'abc') for _ in range(2000))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1 << 20])
+@pytest.mark.parametrize('pattern, mode', [('abc', 'text'), ('aa', 'text'), ('61 62 63 61', 'hex'), ('c', 'text')])
+def test_chunked_literal_search_matches_one_pass(chunk_size, pattern, mode):
+    data = sample_data()
+    regex, overlap = hexpad.compile_search(pattern, mode)
+    assert list(hexpad.iter_search(data, regex, overlap, chunk_size)) == whole_matches(regex, data)
+
+
+@pytest.mark.parametrize('chunk_size', [5, 16, 100])
+def test_chunked_regex_search_matches_one_pass(chunk_size):
+    data = sample_data()
+    regex, overlap = hexpad.compile_search(r'a[bc]{2,5}a', 'regex')
+    assert list(hexpad.iter_search(data, regex, overlap, chunk_size)) == whole_matches(regex, data)
+
+
+def test_match_spanning_a_chunk_boundary_is_found_once():
+    data = b'x' * 10 + b'needle' + b'x' * 10
+    regex, overlap = hexpad.compile_search('needle')
+    for chunk_size in range(1, len(data) + 1):
+        assert list(hexpad.iter_search(data, regex, overlap, chunk_size)) == [(10, 6)]
+
+
+def test_search_a_file_object():
+    data = sample_data()
+    regex, overlap = hexpad.compile_search('cab')
+    assert list(hexpad.iter_search(io.BytesIO(data), regex, overlap, 13)) == whole_matches(regex, data)
+
+
+def test_text_is_encoded_with_the_dump_codepage():
+    data = b'\x00' * 5 + 'CUSTOMER'.encode('cp037')
+    assert hexpad.search_matches(data, 'CUSTOMER', 'text', 'cp037') == [(5, 8)]
+    assert hexpad.search_matches(data, 'CUSTOMER', 'text', 'utf-8') == []
+
+
+def test_hex_pattern_accepts_0x_prefixes():
+    regex, overlap = hexpad.compile_search('0x41 0X42', 'hex')
+    assert regex.pattern == re.escape(b'AB') and overlap == 1
+
+
+def test_regex_escapes_match_raw_bytes():
+    assert hexpad.search_matches(b'\x00\x40\x40\x00', r'\x40+', 'regex') == [(1, 2)]
+
+
+def test_limit_stops_early():
+    assert len(hexpad.search_matches(b'a' * 100, 'a', limit=7)) == 7
+
+
+@pytest.mark.parametrize('pattern, mode, message', [
+    ('', 'text', 'Search pattern is empty'),
+    ('4g', 'hex', 'Hex pattern must be pairs of hex digits'),
+    ('(', 'regex', 'Invalid regex'),
+    ('x', 'glob', "Unknown search mode 'glob'"),
+])
+def test_bad_patterns_are_rejected(pattern, mode, message):
+    with pytest.raises(ValueError, match=message):
+        hexpad.compile_search(pattern, mode)
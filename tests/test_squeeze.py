@@ -0,0 +1,83 @@
+"""Tests for squeezing repeated lines into '*' and expanding them again."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hexpad
+
+SQUEEZING_FORMATS = ['hexpad', 'od', 'canonical']
+
+
+def squeezed(data, output_format='hexpad', bytes_per_line=16):
+    return hexpad.bytes_to_hexdump(data, bytes_per_line=bytes_per_line, squeeze=True, output_format=output_format)
+
+
+def test_repeated_lines_become_one_star():
+    lines = squeezed(bytes(64) + b'abc').split('\n')
+    assert lines[1:] == ['*', '64      61 62 63                                               |abc             |', '67']
+
+
+def test_canonical_squeeze_matches_hexdump_c():
+    assert squeezed(bytes(32), 'canonical').split('\n') == [
+        '00000000  00 00 00 00 00 00 00 00  00 00 00 00 00 00 00 00  |................|',
+        '*',
+        '00000020',
+    ]
+
+
+def test_lines_that_differ_are_kept():
+    data = bytes(range(64))
+    assert squeezed(data).split('\n')[:-1] == hexpad.bytes_to_hexdump(data).split('\n')
+
+
+@pytest.mark.parametrize('output_format', SQUEEZING_FORMATS)
+@pytest.mark.parametrize('bytes_per_line', [8, 16, 32])
+def test_squeezed_round_trip(output_format, bytes_per_line):
+    data = os.urandom(40) + bytes(1000) + b'\x01' * 7 + b'\xaa' * 300 + os.urandom(3)
+    dump = squeezed(data, output_format, bytes_per_line)
+    assert '*' in dump.split('\n')
+    assert b''.join(hexpad.iter_parse_format(dump, output_format)) == data
+
+
+def test_squeeze_across_render_blocks():
+    # A run spanning many blocks of lines still gets a single '*'
+    data = b'x' + bytes(16 * hexpad.HEXDUMP_BLOCK_LINES * 3) + b'y'
+    dump = squeezed(data)
+    assert dump.count('*') == 1
+    assert hexpad.parse_hexdump_bytes(dump) == data
+
+
+def test_chunked_state_matches_one_pass():
+    data = b'abcd' * 64 + os.urandom(48) + bytes(160)
+    whole, _ = hexpad.render_squeezed_lines(data)
+    lines, state = [], None
+    for start in range(0, len(data), 32):
+        chunk_lines, state = hexpad.render_squeezed_lines(data[start:start + 32], start, state=state)
+        lines += chunk_lines
+    assert lines == whole
+
+
+def test_window_never_opens_with_a_star():
+    data = bytes(16 * 100)
+    window = hexpad.hexdump_window(data, 50, 10, squeeze=True)
+    assert window[0].startswith('800 ')
+    assert window[1:] == ['*']
+
+
+def test_star_needs_a_line_before_it():
+    with pytest.raises(ValueError, match="'\\*' without a line to repeat"):
+        hexpad.parse_hexdump_bytes('*\n16\n')
+
+
+def test_star_run_must_end_on_a_whole_line():
+    with pytest.raises(ValueError, match="does not continue the '\\*' run"):
+        hexpad.parse_hexdump_bytes(squeezed(bytes(48)).replace('\n48', '\n40'))
+
+
+def test_star_needs_an_end_offset():
+    dump = squeezed(bytes(48))
+    with pytest.raises(ValueError, match="not followed by the offset"):
+        hexpad.parse_hexdump_bytes(dump[:dump.rindex('\n')])